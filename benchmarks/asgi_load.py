@@ -0,0 +1,220 @@
+"""
+Нагрузочное сравнение WSGI, ASGI с sync- и ASGI с async-страницами.
+
+Засеивает данные, по очереди поднимает uvicorn в трёх режимах и
+обстреливает страницы чтения обоих проектов, измеряя req/s и p50/p99:
+
+    pip install uvicorn
+    python benchmarks/asgi_load.py --project ya_news --seconds 10
+    python benchmarks/asgi_load.py --project ya_note --concurrency 64
+
+Режимы:
+    wsgi        uvicorn --interface wsgi, приложение из wsgi.py;
+    asgi-sync   asgi.py, sync-представления в потоке для sync-кода;
+    asgi-async  asgi.py с DJANGO_ASYNC_VIEWS=1, см. async_views.py.
+"""
+import argparse
+import asyncio
+import atexit
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT, SETTINGS, batched, report, setup_django
+
+MODES = {
+    'wsgi': ('wsgi', 'wsgi', '0'),
+    'asgi-sync': ('asgi3', 'asgi', '0'),
+    'asgi-async': ('asgi3', 'asgi', '1'),
+}
+BATCH_SIZE = 5000
+
+
+def seed_news(options):
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='author')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости.')
+        for index in range(options.news)
+    )
+    news = News.objects.order_by('-date', '-id').first()
+    for batch in batched(
+        (Comment(news=news, author=author, text=f'Комментарий {index}')
+         for index in range(options.comments)),
+        BATCH_SIZE,
+    ):
+        Comment.objects.bulk_create(batch)
+    News.recount_comments()
+    return ['/', f'/news/{news.pk}/'], None
+
+
+def seed_notes(options):
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from notes.models import Note
+
+    author = get_user_model().objects.create(username='author')
+    for batch in batched(
+        (Note(title=f'Заметка {index}', text='Текст заметки.',
+              slug=f'note-{index}', author=author)
+         for index in range(options.notes)),
+        BATCH_SIZE,
+    ):
+        Note.objects.bulk_create(batch)
+    client = Client()
+    client.force_login(author)
+    session = client.cookies['sessionid'].value
+    return ['/notes/', '/note/note-0/'], f'sessionid={session}'
+
+
+def settings_module(project, database, directory):
+    """Модуль настроек проекта, указывающий на засеянную базу."""
+    name = f'bench_settings_{project}'
+    Path(directory, f'{name}.py').write_text(
+        f'from {SETTINGS[project]} import *  # noqa\n'
+        f'DEBUG = False\n'
+        f'ALLOWED_HOSTS = ["127.0.0.1"]\n'
+        f'DATABASES["default"]["NAME"] = {str(database)!r}\n'
+    )
+    return name
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(project, settings, directory, mode):
+    interface, module, async_views = MODES[mode]
+    port = free_port()
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings,
+        DJANGO_ASYNC_VIEWS=async_views,
+        PYTHONPATH=os.pathsep.join((str(ROOT / project), directory)),
+    )
+    package = SETTINGS[project].split('.')[0]
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', f'{package}.{module}:application',
+         '--interface', interface, '--port', str(port),
+         '--log-level', 'warning', '--no-access-log'],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.1).close()
+            return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f'uvicorn не запустился: {project} {mode}')
+
+
+async def read_response(reader):
+    """Читает ответ HTTP/1.1; возвращает код ответа."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {
+        key.lower(): value.strip()
+        for key, _, value in (line.partition(':') for line in lines[1:])
+    }
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    return int(lines[0].split()[1])
+
+
+async def worker(port, request, stop_at, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(port, path, cookie, seconds, concurrency):
+    request = (
+        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+        + (f'Cookie: {cookie}\r\n' if cookie else '')
+        + '\r\n'
+    ).encode()
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + seconds
+    await asyncio.gather(*(
+        worker(port, request, stop_at, latencies, errors)
+        for _ in range(concurrency)
+    ))
+    latencies.sort()
+
+    def percentile(value):
+        index = min(len(latencies) - 1, int(len(latencies) * value))
+        return round(latencies[index] * 1000, 1)
+
+    return {
+        'rps': round(len(latencies) / seconds),
+        'p50_ms': percentile(0.5),
+        'p99_ms': percentile(0.99),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--project', choices=SETTINGS, default='ya_news')
+    parser.add_argument(
+        '--mode', choices=MODES, action='append',
+        help='Режим; по умолчанию все.',
+    )
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=100)
+    parser.add_argument('--notes', type=int, default=1000)
+    options = parser.parse_args()
+    project = options.project
+    directory = tempfile.mkdtemp(prefix='bench-')
+    atexit.register(shutil.rmtree, directory, True)
+    database = Path(directory) / 'bench.sqlite3'
+    setup_django(project, database)
+    seed = seed_news if project == 'ya_news' else seed_notes
+    paths, cookie = seed(options)
+    settings = settings_module(project, database, directory)
+    results = {'project': project, 'concurrency': options.concurrency}
+    for mode in options.mode or MODES:
+        server, port = start_server(project, settings, directory, mode)
+        try:
+            for path in paths:
+                asyncio.run(load(port, path, cookie, 1, 4))
+                results[f'{mode} {path}'] = asyncio.run(load(
+                    port, path, cookie, options.seconds, options.concurrency
+                ))
+        finally:
+            server.terminate()
+            server.wait()
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Сравнение проверки комментария на запрещённые слова.
+
+Старый способ — поиск подстроки по каждому слову, новый — один
+регэксп из news.profanity. Текст без совпадений — худший случай:
+
+    python benchmarks/bad_words.py --sizes 10 1000 10000
+"""
+import argparse
+import random
+import timeit
+
+from common import report, use_project
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+
+
+def random_words(count, rng):
+    return [
+        ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 10)))
+        for _ in range(count)
+    ]
+
+
+def loop_search(words, text):
+    lowered_text = text.lower()
+    return any(word in lowered_text for word in words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10, 1000, 10_000]
+    )
+    parser.add_argument('--text-length', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=200)
+    options = parser.parse_args()
+    use_project('ya_news')
+    from news.profanity import BadWordsMatcher
+
+    rng = random.Random(0)
+    text = ' '.join(random_words(options.text_length // 8, rng)).upper()
+    results = {}
+    for size in options.sizes:
+        words = random_words(size, rng)
+        words = [word for word in words if word not in text.lower()]
+        build = timeit.timeit(lambda: BadWordsMatcher(words), number=1)
+        matcher = BadWordsMatcher(words)
+        loop = timeit.timeit(
+            lambda: loop_search(words, text), number=options.repeat
+        )
+        compiled = timeit.timeit(
+            lambda: matcher.search(text), number=options.repeat
+        )
+        results[size] = {
+            'build_ms': round(build * 1000, 2),
+            'loop_us': round(loop / options.repeat * 1e6, 1),
+            'compiled_us': round(compiled / options.repeat * 1e6, 1),
+            'speedup': round(loop / compiled, 1),
+        }
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Время вывода комментариев news/detail.html в зависимости от их числа.
+
+Сравнивает прежний цикл шаблона (сравнение автора, {% url %} и
+linebreaksbr на каждый комментарий) с подготовкой в prepare_comments:
+с пустым кэшем HTML текстов и с заполненным:
+
+    python benchmarks/comment_render.py --counts 100 1000 5000
+"""
+import argparse
+import statistics
+import time
+
+from common import batched, report, setup_django
+
+BATCH_SIZE = 5000
+
+BEFORE = '''
+{% for comment in comments %}
+  <p class="mb-0">{{ comment.text|linebreaksbr }}</p>
+  {% if comment.author == user %}
+    <a href="{% url 'news:edit' comment.pk %}">Редактировать</a> |
+    <a href="{% url 'news:delete' comment.pk %}">Удалить</a>
+  {% endif %}
+{% endfor %}
+'''
+AFTER = '''
+{% for comment in comments %}
+  <p class="mb-0">{{ comment.body_html }}</p>
+  {% if comment.is_owner %}
+    <a href="{{ comment.edit_url }}">Редактировать</a> |
+    <a href="{{ comment.delete_url }}">Удалить</a>
+  {% endif %}
+{% endfor %}
+'''
+
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--counts', type=int, nargs='+', default=[100, 500, 1000, 5000]
+    )
+    parser.add_argument('--repeat', type=int, default=10)
+    options = parser.parse_args()
+    setup_django('ya_news')
+    from django.contrib.auth import get_user_model
+    from django.template import Context, engines
+
+    from news.cache import comment_cache_stats, get_comment_cache
+    from news.models import Comment, News
+    from news.rendering import prepare_comments
+
+    engine = engines['django'].engine
+    before, after = engine.from_string(BEFORE), engine.from_string(AFTER)
+    reader, other = (
+        get_user_model().objects.create(username=name)
+        for name in ('reader', 'other')
+    )
+    results = {}
+    for count in options.counts:
+        news = News.objects.create(title=f'Новость {count}', text='Текст.')
+        for batch in batched(
+            (Comment(news=news, author=(reader, other)[index % 2],
+                     text=f'Комментарий {index}\nвторая строка')
+             for index in range(count)),
+            BATCH_SIZE,
+        ):
+            Comment.objects.bulk_create(batch)
+        comments = list(news.comment_set.select_related('author'))
+
+        def render_before():
+            before.render(Context({'comments': comments, 'user': reader}))
+
+        def render_after():
+            after.render(Context({
+                'comments': prepare_comments(comments, reader),
+                'user': reader,
+            }))
+
+        def render_after_cold():
+            get_comment_cache().clear()
+            render_after()
+
+        results[count] = {
+            'before_ms': median_ms(render_before, options.repeat),
+            'after_cold_cache_ms': median_ms(
+                render_after_cold, options.repeat
+            ),
+            'after_ms': median_ms(render_after, options.repeat),
+        }
+    results['comment_cache'] = comment_cache_stats.info()
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
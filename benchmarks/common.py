@@ -0,0 +1,70 @@
+"""Общие помощники для бенчмарков обоих проектов."""
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SETTINGS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def use_project(project):
+    """Делает модули проекта импортируемыми без запуска Django."""
+    sys.path.insert(0, str(ROOT / project))
+    os.environ['DJANGO_SETTINGS_MODULE'] = SETTINGS[project]
+
+
+def setup_django(project, database=None):
+    """
+    Поднимает Django указанного проекта на отдельной SQLite-базе.
+
+    По умолчанию база создаётся во временном каталоге и удаляется
+    при выходе, рабочая db.sqlite3 проекта не затрагивается.
+    """
+    use_project(project)
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    if database is None:
+        directory = tempfile.mkdtemp(prefix='bench-')
+        atexit.register(shutil.rmtree, directory, True)
+        database = Path(directory) / 'bench.sqlite3'
+    settings.DATABASES['default']['NAME'] = database
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+
+def batched(iterable, size):
+    """Разбивает поток объектов на списки не длиннее size."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@contextmanager
+def timer(results, name):
+    """Записывает в results[name] время выполнения блока в секундах."""
+    start = time.perf_counter()
+    yield
+    results[name] = round(time.perf_counter() - start, 4)
+
+
+def report(results):
+    """Печатает результаты в JSON, чтобы их было удобно сравнивать."""
+    print(json.dumps(results, ensure_ascii=False, indent=2))
@@ -0,0 +1,110 @@
+"""
+Запросы и время страниц админки на популярной новости.
+
+Засеивает 100k пользователей, 1000 новостей и 20k комментариев:
+половина — к одной популярной новости, остальные разбросаны по
+другим. Открывает страницу новости, список её комментариев, общий
+список комментариев без фильтра и страницу комментария:
+
+    python benchmarks/news_admin.py --users 100000 --news 1000 \\
+        --comments 20000 --max-queries 10 --max-ms 500
+"""
+import argparse
+import time
+
+from common import batched, report, setup_django
+
+BATCH_SIZE = 5000
+
+
+def measure(client, url):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - start
+    assert response.status_code == 200, (url, response.status_code)
+    return len(queries), round(elapsed * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20_000)
+    parser.add_argument('--max-queries', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=500)
+    options = parser.parse_args()
+    setup_django('ya_news')
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    from news.models import Comment, News
+
+    User = get_user_model()
+    for batch in batched(
+        (User(username=f'user{index}') for index in range(options.users)),
+        BATCH_SIZE,
+    ):
+        User.objects.bulk_create(batch)
+    user_ids = list(User.objects.values_list('id', flat=True))
+    news = News.objects.create(title='Популярная новость', text='Текст.')
+    for batch in batched(
+        (News(title=f'Новость {index}', text='Текст.')
+         for index in range(options.news - 1)),
+        BATCH_SIZE,
+    ):
+        News.objects.bulk_create(batch)
+    # Нечётные комментарии — к популярной новости, чётные — по кругу
+    # к остальным.
+    news_ids = list(
+        News.objects.exclude(pk=news.pk).values_list('id', flat=True)
+    ) or [news.pk]
+    for batch in batched(
+        (Comment(news_id=(news.pk if index % 2
+                          else news_ids[index // 2 % len(news_ids)]),
+                 author_id=user_ids[index % len(user_ids)],
+                 text=f'Комментарий {index}')
+         for index in range(options.comments)),
+        BATCH_SIZE,
+    ):
+        Comment.objects.bulk_create(batch)
+    News.recount_comments()
+    comment = Comment.objects.first()
+
+    admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(admin)
+    pages = {
+        'news_change': reverse('admin:news_news_change', args=(news.pk,)),
+        'news_changelist': reverse('admin:news_news_changelist'),
+        'comment_changelist': (
+            reverse('admin:news_comment_changelist')
+            + f'?news__id__exact={news.pk}'
+        ),
+        'comment_changelist_all': reverse('admin:news_comment_changelist'),
+        'comment_change': reverse(
+            'admin:news_comment_change', args=(comment.pk,)
+        ),
+    }
+    results = {
+        'users': options.users,
+        'news': options.news,
+        'comments': options.comments,
+    }
+    for name, url in pages.items():
+        client.get(url)
+        results[f'{name}_queries'], results[f'{name}_ms'] = measure(
+            client, url
+        )
+    report(results)
+    for name in pages:
+        assert results[f'{name}_queries'] <= options.max_queries, name
+        assert results[f'{name}_ms'] <= options.max_ms, name
+
+
+if __name__ == '__main__':
+    main()
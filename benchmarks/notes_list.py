@@ -0,0 +1,70 @@
+"""
+Время ответа и пиковая память страницы notes:list.
+
+Засеивает пользователю 50k заметок с длинным текстом и открывает
+первую и последнюю страницы списка:
+
+    python benchmarks/notes_list.py --notes 50000 --max-ms 200 --max-mb 5
+"""
+import argparse
+import time
+import tracemalloc
+
+from common import batched, report, setup_django
+
+BATCH_SIZE = 5000
+
+
+def measure(client, url, params):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, params)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert response.status_code == 200, response.status_code
+    return round(elapsed * 1000, 1), round(peak / 2 ** 20, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--notes', type=int, default=50_000)
+    parser.add_argument('--text-length', type=int, default=2000)
+    parser.add_argument('--max-ms', type=float, default=200)
+    parser.add_argument('--max-mb', type=float, default=5)
+    options = parser.parse_args()
+    setup_django('ya_note')
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    author = get_user_model().objects.create(username='author')
+    text = 'Текст заметки. ' * (options.text_length // 15)
+    rows = (
+        Note(title=f'Заметка {index}', text=text, slug=f'note-{index}',
+             author=author)
+        for index in range(options.notes)
+    )
+    for batch in batched(rows, BATCH_SIZE):
+        Note.objects.bulk_create(batch)
+    last = Note.objects.order_by('-id').values_list('id', flat=True)[100]
+
+    client = Client()
+    client.force_login(author)
+    url = reverse('notes:list')
+    client.get(url)
+    results = {'notes': options.notes}
+    for name, params in (('first_page', {}), ('last_page', {'after': last})):
+        milliseconds, megabytes = measure(client, url, params)
+        results[f'{name}_ms'] = milliseconds
+        results[f'{name}_peak_mb'] = megabytes
+    report(results)
+    for name in ('first_page', 'last_page'):
+        assert results[f'{name}_ms'] <= options.max_ms, name
+        assert results[f'{name}_peak_mb'] <= options.max_mb, name
+
+
+if __name__ == '__main__':
+    main()
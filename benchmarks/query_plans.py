@@ -0,0 +1,130 @@
+"""
+Проверка планов запросов на больших объёмах.
+
+Засеивает базу и убеждается, что горячие запросы обоих проектов
+идут по составным индексам и не сортируют строки в памяти:
+
+    python benchmarks/query_plans.py ya_news --comments 1000000
+    python benchmarks/query_plans.py ya_note --notes 1000000
+"""
+import argparse
+
+from common import batched, report, setup_django, timer
+
+BATCH_SIZE = 10_000
+
+
+def seed_users(count):
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    for batch in batched(range(count), BATCH_SIZE):
+        User.objects.bulk_create(
+            User(username=f'user-{index}') for index in batch
+        )
+    return list(User.objects.values_list('pk', flat=True))
+
+
+def news_plans(options, results):
+    from datetime import date, timedelta
+
+    from django.db import connection
+
+    from news.models import Comment, News
+
+    with timer(results, 'seed_seconds'):
+        users = seed_users(options.users)
+        today = date.today()
+        News.objects.bulk_create(
+            News(title=f'Новость {index}', text='Текст',
+                 date=today - timedelta(days=index % 3650))
+            for index in range(options.news)
+        )
+        news = list(News.objects.values_list('pk', flat=True))
+        rows = (
+            Comment(news_id=news[index % len(news)],
+                    author_id=users[index % len(users)],
+                    text='Комментарий')
+            for index in range(options.comments)
+        )
+        for batch in batched(rows, BATCH_SIZE):
+            Comment.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    return {
+        'news_home': (
+            News.objects.order_by('-date', '-pk')[:10],
+            'news_date_id_idx',
+        ),
+        'comments_of_news': (
+            Comment.objects.filter(news_id=news[0])
+            .order_by('created', 'pk')[:100],
+            'comment_news_created_idx',
+        ),
+        'comments_admin_list': (
+            Comment.objects.order_by('created', 'id')[:100],
+            'comment_created_id_idx',
+        ),
+        'comments_of_author': (
+            Comment.objects.filter(author_id=users[0]).order_by('created'),
+            'comment_author_created_idx',
+        ),
+    }
+
+
+def note_plans(options, results):
+    from django.db import connection
+
+    from notes.models import Note
+
+    with timer(results, 'seed_seconds'):
+        users = seed_users(options.users)
+        rows = (
+            Note(title='Заметка', text='Текст', slug=f'note-{index}',
+                 author_id=users[index % len(users)])
+            for index in range(options.notes)
+        )
+        for batch in batched(rows, BATCH_SIZE):
+            Note.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    return {
+        'notes_of_author': (
+            Note.objects.filter(author_id=users[0]).order_by('id')[:100],
+            'note_author_id_idx',
+        ),
+    }
+
+
+PLANS = {
+    'ya_news': news_plans,
+    'ya_note': note_plans,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('project', choices=PLANS)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--news', type=int, default=10_000)
+    parser.add_argument('--comments', type=int, default=1_000_000)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    options = parser.parse_args()
+    setup_django(options.project)
+
+    results = {}
+    failures = []
+    for name, (queryset, index) in PLANS[options.project](
+            options, results).items():
+        plan = queryset.explain()
+        with timer(results, f'{name}_seconds'):
+            list(queryset)
+        results[f'{name}_plan'] = plan
+        if index not in plan or 'TEMP B-TREE' in plan:
+            failures.append(f'{name}: ожидался индекс {index}')
+    report(results)
+    assert not failures, '\n'.join(failures)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""
+Нагрузочный прогон страниц обоих проектов через WSGI- и ASGI-клиент.
+
+Засеивает данные в доле --scale от полных объёмов (1M новостей, 10M
+комментариев, 100k пользователей, 1M заметок), гоняет сценарии по
+настоящим URLconf при --concurrency одновременных клиентах в процессе
+и пишет JSON: запросы в секунду, p50/p95/p99, гистограмму задержек и
+число запросов к базе на сценарий:
+
+    python benchmarks/run.py --scale 0.01 --output benchmarks/baseline.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+
+С --baseline результат сравнивается с сохранённым: сценарий, ставший
+медленнее больше чем на --tolerance или делающий больше запросов к
+базе, — регрессия, и скрипт завершается с кодом 1. Время зависит от
+машины, поэтому baseline снимается на той же машине и с теми же
+--scale, --concurrency и --seconds; с другими параметрами сравнение
+не запускается. baseline.example.json — пример формата, не эталон.
+Каждый проект прогоняется в своём процессе.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from itertools import count
+from urllib.parse import urlencode
+
+from common import SETTINGS, batched, report, setup_django
+
+FULL_SCALE = {
+    'news': 1_000_000,
+    'comments': 10_000_000,
+    'users': 100_000,
+    'notes': 1_000_000,
+}
+BATCH_SIZE = 5000
+# Верхние границы корзин гистограммы задержек, мс.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+CLIENTS = ('wsgi', 'asgi')
+# Параметры прогона, которые пишутся в результат и должны совпасть
+# с baseline.
+PARAMETERS = ('scale', 'concurrency', 'seconds')
+FORM = 'application/x-www-form-urlencoded'
+
+Scenario = namedtuple('Scenario', 'name method path data login')
+
+
+def volume(options, name):
+    return max(int(FULL_SCALE[name] * options.scale), 1)
+
+
+def seed_users(options):
+    """Пользователи; первый — тот, от чьего имени идут сценарии."""
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    for batch in batched(
+        (User(username=f'user{index}')
+         for index in range(volume(options, 'users'))),
+        BATCH_SIZE,
+    ):
+        User.objects.bulk_create(batch)
+    return list(User.objects.order_by('id').values_list('id', flat=True))
+
+
+def seed_news(options):
+    """Новости и комментарии по кругу между новостями и авторами."""
+    from django.urls import reverse
+
+    from news.models import Comment, News
+
+    user_ids = seed_users(options)
+    for batch in batched(
+        (News(title=f'Новость {index}', text='Текст новости.')
+         for index in range(volume(options, 'news'))),
+        BATCH_SIZE,
+    ):
+        News.objects.bulk_create(batch)
+    news_ids = list(
+        News.objects.order_by('-date', '-id').values_list('id', flat=True)
+    )
+    for batch in batched(
+        (Comment(news_id=news_ids[index % len(news_ids)],
+                 author_id=user_ids[index % len(user_ids)],
+                 text=f'Комментарий {index}')
+         for index in range(volume(options, 'comments'))),
+        BATCH_SIZE,
+    ):
+        Comment.objects.bulk_create(batch)
+    News.recount_comments()
+    comment = Comment.objects.filter(
+        news_id=news_ids[0], author_id=user_ids[0]
+    ).first()
+    detail = reverse('news:detail', args=(news_ids[0],))
+    edit = reverse('news:edit', args=(comment.pk,))
+    return user_ids[0], (
+        Scenario('news:home GET', 'get', reverse('news:home'), None, False),
+        Scenario('news:detail GET', 'get', detail, None, False),
+        Scenario('news:edit GET', 'get', edit, None, True),
+        Scenario(
+            'news:detail POST', 'post', detail,
+            lambda: {'text': 'Новый комментарий'}, True,
+        ),
+        Scenario(
+            'news:edit POST', 'post', edit,
+            lambda: {'text': 'Исправленный комментарий'}, True,
+        ),
+    )
+
+
+def seed_notes(options):
+    """Заметки по кругу между пользователями."""
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    user_ids = seed_users(options)
+    for batch in batched(
+        (Note(title=f'Заметка {index}', text='Текст заметки.',
+              slug=f'note-{index}',
+              author_id=user_ids[index % len(user_ids)])
+         for index in range(volume(options, 'notes'))),
+        BATCH_SIZE,
+    ):
+        Note.objects.bulk_create(batch)
+    note = Note.objects.filter(author_id=user_ids[0]).first()
+    titles = count()
+    return user_ids[0], (
+        Scenario('notes:home GET', 'get', reverse('notes:home'), None, False),
+        Scenario('notes:list GET', 'get', reverse('notes:list'), None, True),
+        Scenario(
+            'notes:detail GET', 'get',
+            reverse('notes:detail', args=(note.slug,)), None, True,
+        ),
+        Scenario('notes:add GET', 'get', reverse('notes:add'), None, True),
+        Scenario(
+            'notes:add POST', 'post', reverse('notes:add'),
+            lambda: {'title': f'Новая заметка {next(titles)}',
+                     'text': 'Текст.'},
+            True,
+        ),
+    )
+
+
+def make_client(client_class, scenario, user_id):
+    from django.contrib.auth import get_user_model
+
+    client = client_class()
+    if scenario.login:
+        client.force_login(get_user_model().objects.get(pk=user_id))
+    return client
+
+
+def send(client, scenario):
+    """
+    Запрос сценария; у AsyncClient возвращает корутину.
+
+    Форма уходит urlencoded: multipart от AsyncClient в Django 3.2
+    ASGIRequest читает за концом тела.
+    """
+    request = getattr(client, scenario.method)
+    if scenario.data is None:
+        return request(scenario.path)
+    return request(
+        scenario.path, urlencode(scenario.data()), content_type=FORM
+    )
+
+
+def count_queries(scenario, user_id):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = make_client(Client, scenario, user_id)
+    with CaptureQueriesContext(connection) as queries:
+        response = send(client, scenario)
+    assert response.status_code < 400, (scenario, response.status_code)
+    return len(queries)
+
+
+def summarize(latencies, errors, seconds):
+    """Пропускная способность, перцентили и гистограмма в мс."""
+    milliseconds = sorted(latency * 1000 for latency in latencies)
+    if not milliseconds:
+        return {'rps': 0, 'errors': errors}
+    histogram = [0] * (len(BUCKETS_MS) + 1)
+    for value in milliseconds:
+        histogram[bisect.bisect_left(BUCKETS_MS, value)] += 1
+    labels = [f'<={bound}' for bound in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}']
+    percentiles = statistics.quantiles(milliseconds, n=100, method='inclusive')
+    return {
+        'rps': round(len(milliseconds) / seconds, 1),
+        'p50_ms': round(percentiles[49], 2),
+        'p95_ms': round(percentiles[94], 2),
+        'p99_ms': round(percentiles[98], 2),
+        'max_ms': round(milliseconds[-1], 2),
+        'errors': errors,
+        'histogram_ms': dict(zip(labels, histogram)),
+    }
+
+
+def run_wsgi(scenario, user_id, options):
+    """--concurrency потоков, у каждого свой Client (WSGIHandler)."""
+    from django.db import connection
+    from django.test import Client
+
+    clients = [
+        make_client(Client, scenario, user_id)
+        for _ in range(options.concurrency)
+    ]
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + options.seconds
+
+    def loop(client):
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                failed = send(client, scenario).status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            if failed:
+                errors.append(1)
+        connection.close()
+
+    threads = [
+        threading.Thread(target=loop, args=(client,)) for client in clients
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, len(errors), options.seconds)
+
+
+def run_asgi(scenario, user_id, options):
+    """--concurrency задач в одном цикле событий, AsyncClient (ASGIHandler)."""
+    from django.test import AsyncClient
+
+    clients = [
+        make_client(AsyncClient, scenario, user_id)
+        for _ in range(options.concurrency)
+    ]
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + options.seconds
+
+    async def loop(client):
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                failed = (await send(client, scenario)).status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            if failed:
+                errors.append(1)
+
+    async def gather():
+        await asyncio.gather(*(loop(client) for client in clients))
+
+    asyncio.run(gather())
+    return summarize(latencies, len(errors), options.seconds)
+
+
+def run_project(options):
+    setup_django(options.project)
+    from django.conf import settings
+
+    # AsyncClient в Django 3.2 всегда шлёт Host: testserver.
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    seed = seed_news if options.project == 'ya_news' else seed_notes
+    started = time.perf_counter()
+    user_id, scenarios = seed(options)
+    results = {'seed_seconds': round(time.perf_counter() - started, 1)}
+    for scenario in scenarios:
+        results[scenario.name] = {
+            'queries': count_queries(scenario, user_id),
+            'wsgi': run_wsgi(scenario, user_id, options),
+            'asgi': run_asgi(scenario, user_id, options),
+        }
+    return results
+
+
+def mismatched_parameters(options, baseline):
+    """Параметры прогона, которыми options отличаются от baseline."""
+    return [
+        f'--{name} {getattr(options, name)} (в baseline {baseline.get(name)})'
+        for name in PARAMETERS
+        if getattr(options, name) != baseline.get(name)
+    ]
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно baseline: список строк."""
+    regressions = []
+    for project in SETTINGS:
+        for name, old in baseline.get(project, {}).items():
+            new = results.get(project, {}).get(name)
+            if not isinstance(old, dict) or new is None:
+                continue
+            where = f'{project} {name}'
+            if new['queries'] > old['queries']:
+                regressions.append(
+                    f'{where}: запросов {old["queries"]} → {new["queries"]}'
+                )
+            for client in CLIENTS:
+                before, after = old[client], new[client]
+                if after['rps'] < before['rps'] * (1 - tolerance):
+                    regressions.append(
+                        f'{where} {client}: rps '
+                        f'{before["rps"]} → {after["rps"]}'
+                    )
+                if after.get('p95_ms', 0) > (
+                    before.get('p95_ms', 0) * (1 + tolerance)
+                ):
+                    regressions.append(
+                        f'{where} {client}: p95 '
+                        f'{before["p95_ms"]} → {after["p95_ms"]} мс'
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--project', choices=SETTINGS, action='append')
+    parser.add_argument(
+        '--scale', type=float, default=0.01,
+        help='Доля полных объёмов; 1 — 1M новостей, 10M комментариев…',
+    )
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument(
+        '--seconds', type=float, default=3,
+        help='Длительность каждого сценария для каждого клиента.',
+    )
+    parser.add_argument('--output', help='Куда записать JSON результата.')
+    parser.add_argument('--baseline', help='JSON прежнего прогона.')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+    if options.child:
+        options.project = options.project[0]
+        print(json.dumps(run_project(options)))
+        return
+    baseline = None
+    if options.baseline:
+        with open(options.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        mismatched = mismatched_parameters(options, baseline)
+        if mismatched:
+            parser.error(
+                'параметры прогона не совпадают с baseline: '
+                + ', '.join(mismatched)
+            )
+    results = {name: getattr(options, name) for name in PARAMETERS}
+    for project in options.project or SETTINGS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--project', project,
+             '--scale', str(options.scale),
+             '--concurrency', str(options.concurrency),
+             '--seconds', str(options.seconds)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[project] = json.loads(output.splitlines()[-1])
+    report(results)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, options.tolerance)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
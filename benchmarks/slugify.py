@@ -0,0 +1,61 @@
+"""
+Транслитерация заголовков заметок: pytils напрямую и через LRU-кэш.
+
+Корпус заголовков собирается из словаря с распределением Ципфа,
+как у реальных заметок: много повторов вроде «Список покупок».
+
+    python benchmarks/slugify.py --titles 100000
+"""
+import argparse
+import random
+import time
+
+from common import report, setup_django
+
+WORDS = (
+    'список покупок дела на неделю идеи для подарков рецепт борща '
+    'план отпуска заметки встречи книги прочитать фильмы посмотреть '
+    'расходы за месяц пароль от роутера тренировка утро вечер звонок '
+    'маме проект отчёт квартальный задачи команды черновик письма'
+).split()
+
+
+def corpus(size, vocabulary, rng):
+    weights = [1 / rank for rank in range(1, vocabulary + 1)]
+    titles = [
+        ' '.join(rng.sample(WORDS, rng.randint(2, 5))).capitalize()
+        for _ in range(vocabulary)
+    ]
+    return rng.choices(titles, weights=weights, k=size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--titles', type=int, default=100_000)
+    parser.add_argument('--vocabulary', type=int, default=20_000)
+    options = parser.parse_args()
+    setup_django('ya_note')
+    from pytils.translit import slugify
+
+    from notes.slugs import slug_cache_info, slugify_title
+
+    titles = corpus(options.titles, options.vocabulary, random.Random(0))
+    start = time.perf_counter()
+    for title in titles:
+        slugify(title)[:100]
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    for title in titles:
+        slugify_title(title, 100)
+    cached = time.perf_counter() - start
+    report({
+        'titles': options.titles,
+        'plain_seconds': round(plain, 3),
+        'cached_seconds': round(cached, 3),
+        'speedup': round(plain / cached, 1),
+        'cache': slug_cache_info(),
+    })
+
+
+if __name__ == '__main__':
+    main()
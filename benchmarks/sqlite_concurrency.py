@@ -0,0 +1,139 @@
+"""
+Одновременная запись комментариев и чтение главной на SQLite.
+
+Писатели в отдельных потоках отправляют комментарии через NewsComment,
+читатели открывают главную (NewsList). Для каждого профиля базы
+печатает число ошибок блокировки и запросов в секунду:
+
+    python benchmarks/sqlite_concurrency.py --writers 8 --readers 8
+    python benchmarks/sqlite_concurrency.py --profile production
+
+Без --profile сравниваются оба профиля, каждый в своём процессе.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from common import report, setup_django
+
+PROFILES = ('default', 'production')
+HOST = 'localhost'
+
+
+def run_clients(clients, url, make_request, seconds):
+    """Гоняет запросы из потоков; возвращает счётчик исходов."""
+    from django.db import OperationalError, connection
+
+    outcomes = Counter()
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def loop(client):
+        local = Counter()
+        while time.perf_counter() < stop_at:
+            try:
+                response = make_request(client, url)
+                local['ok' if response.status_code < 400 else 'http'] += 1
+            except OperationalError as error:
+                local['locked' if 'locked' in str(error) else 'other'] += 1
+        connection.close()
+        with lock:
+            outcomes.update(local)
+
+    threads = [
+        threading.Thread(target=loop, args=(client,)) for client in clients
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def measure(options):
+    os.environ['DJANGO_DB_PROFILE'] = options.profile
+    setup_django('ya_news')
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from news.models import News
+
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст.') for index in range(100)
+    )
+    news = News.objects.first()
+    writers = []
+    for index in range(options.writers):
+        client = Client(SERVER_NAME=HOST)
+        client.force_login(
+            get_user_model().objects.create(username=f'writer{index}')
+        )
+        writers.append(client)
+    connection.close()
+
+    def post(client, url):
+        return client.post(url, {'text': 'Комментарий'})
+
+    def get(client, url):
+        return client.get(url)
+
+    write_threads, writes = run_clients(
+        writers, reverse('news:detail', args=(news.pk,)), post,
+        options.seconds,
+    )
+    read_threads, reads = run_clients(
+        [Client(SERVER_NAME=HOST) for _ in range(options.readers)],
+        reverse('news:home'), get, options.seconds,
+    )
+    for thread in write_threads + read_threads:
+        thread.join()
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    return {
+        'journal_mode': journal_mode,
+        'writes_per_second': round(writes['ok'] / options.seconds),
+        'reads_per_second': round(reads['ok'] / options.seconds),
+        'write_lock_errors': writes['locked'],
+        'read_lock_errors': reads['locked'],
+        'other_errors': sum(
+            count for outcomes in (writes, reads)
+            for key, count in outcomes.items() if key not in ('ok', 'locked')
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--profile', choices=PROFILES)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    options = parser.parse_args()
+    if options.profile:
+        print(json.dumps(measure(options)))
+        return
+    results = {
+        'writers': options.writers,
+        'readers': options.readers,
+        'seconds': options.seconds,
+    }
+    for profile in PROFILES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--profile', profile,
+             '--writers', str(options.writers),
+             '--readers', str(options.readers),
+             '--seconds', str(options.seconds)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[profile] = json.loads(output.splitlines()[-1])
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
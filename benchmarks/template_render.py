@@ -0,0 +1,101 @@
+"""
+Время отрисовки news/detail.html с отладочным и продакшен-загрузчиком.
+
+Засеивает новость с 500 комментариями (половина — от читателя, чтобы
+выводились ссылки на правку) и рисует страницу через движок с
+настройками yanews.settings и yanews.settings_production:
+
+    python benchmarks/template_render.py --comments 500 --repeat 50
+
+load — поиск и разбор самого detail.html, это и экономит кэширующий
+загрузчик; base.html и include загружаются уже при отрисовке.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from common import batched, report, setup_django
+
+BATCH_SIZE = 5000
+
+
+def backend(config, name, debug):
+    from django.template.backends.django import DjangoTemplates
+
+    params = {key: value for key, value in config.items() if key != 'BACKEND'}
+    params['OPTIONS'] = {**config['OPTIONS'], 'debug': debug}
+    return DjangoTemplates({**params, 'NAME': name})
+
+
+def load_ms(engine):
+    start = time.perf_counter()
+    engine.get_template('news/detail.html')
+    return (time.perf_counter() - start) * 1000
+
+
+def render_ms(engine, context, request):
+    start = time.perf_counter()
+    engine.get_template('news/detail.html').render(context, request)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--comments', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    options = parser.parse_args()
+    setup_django('ya_news')
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import RequestFactory
+
+    from news.forms import CommentForm
+    from news.models import Comment, News
+
+    # Нужны только TEMPLATES продакшена, а без DJANGO_SECRET_KEY
+    # модуль настроек не импортируется.
+    os.environ.setdefault('DJANGO_SECRET_KEY', settings.SECRET_KEY)
+    from yanews import settings_production
+
+    reader, other = (
+        get_user_model().objects.create(username=name)
+        for name in ('reader', 'other')
+    )
+    news = News.objects.create(title='Новость', text='Текст новости.')
+    for batch in batched(
+        (Comment(news=news, author=(reader, other)[index % 2],
+                 text=f'Комментарий {index}\nвторая строка')
+         for index in range(options.comments)),
+        BATCH_SIZE,
+    ):
+        Comment.objects.bulk_create(batch)
+    request = RequestFactory().get('/')
+    request.user = reader
+    context = {
+        'news': news,
+        'object': news,
+        'comments': list(news.comment_set.select_related('author')),
+        'form': CommentForm(),
+    }
+    results = {'comments': options.comments}
+    for name, config, debug in (
+        ('debug', settings.TEMPLATES[0], True),
+        ('production', settings_production.TEMPLATES[0], False),
+    ):
+        engine = backend(config, name, debug)
+        results[f'{name}_first_ms'] = round(
+            render_ms(engine, context, request), 2
+        )
+        results[f'{name}_load_median_ms'] = round(statistics.median(
+            load_ms(engine) for _ in range(options.repeat)
+        ), 3)
+        results[f'{name}_median_ms'] = round(statistics.median(
+            render_ms(engine, context, request)
+            for _ in range(options.repeat)
+        ), 2)
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,70 @@
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
 
+from . import search
 from .models import Comment, News
 
 
-class CommentInline(admin.StackedInline):
-    model = Comment
-    extra = 0
-
-
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
-    inlines = [
-        CommentInline,
-    ]
+    """
+    Новости без встроенных комментариев.
+
+    Инлайн на популярной новости рисовал тысячи форм, каждая со списком
+    всех пользователей. Вместо него — счётчик и ссылка на постраничный
+    список комментариев этой новости.
+    """
+    list_display = ('title', 'date', 'comment_count')
+    readonly_fields = ('comment_count', 'comments_link')
+    search_fields = ('title',)
+    show_full_result_count = False
+
+    @admin.display(description='Комментарии')
+    def comments_link(self, obj):
+        if obj.pk is None:
+            return '—'
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">Все комментарии ({})</a>',
+            url, obj.pk, obj.comment_count,
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    # Полный порядок: без id список дописывает -pk и сортирует сам.
+    # Без фильтра он идёт по индексу (created, id), с фильтром по
+    # новости — по (news, created, id).
+    ordering = ('created', 'id')
+    raw_id_fields = ('news', 'author')
+    readonly_fields = ('created',)
+    search_fields = ('text',)
+    show_full_result_count = False
+
+    def get_readonly_fields(self, request, obj=None):
+        """
+        Новость у существующего комментария не меняется: Comment.save
+        ведёт comment_count только при создании, и перенос оставил бы
+        неверными счётчики и кэш главной у обеих новостей.
+        """
+        if obj is not None:
+            return (*self.readonly_fields, 'news')
+        return self.readonly_fields
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищем по полнотекстовому индексу, а не icontains по всей таблице."""
+        if not search_term.strip():
+            return queryset, False
+        return search.search(queryset, search_term), False
+
+    def delete_queryset(self, request, queryset):
+        """
+        Массовое удаление обходит Comment.delete, поэтому счётчики
+        затронутых новостей пересчитываются отдельно.
+        """
+        news_ids = set(queryset.values_list('news_id', flat=True))
+        super().delete_queryset(request, queryset)
+        News.recount_comments(News.objects.filter(pk__in=news_ids))
@@ -0,0 +1,52 @@
+"""
+Асинхронные версии страниц чтения для ASGI.
+
+Включаются настройкой ASYNC_VIEWS (переменная окружения
+DJANGO_ASYNC_VIEWS=1), см. news/urls.py.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from . import views
+
+
+def _run(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+# В Django 3.2 нет асинхронного ORM, поэтому sync-представление
+# выполняется целиком, вместе с отрисовкой шаблона, в общем пуле потоков
+# (thread_sensitive=False), а не в единственном потоке для sync-кода,
+# через который иначе по очереди проходят все запросы. У потоков пула
+# свои соединения с базой: как и обработчик запросов, закрываем
+# устаревшие до и после.
+in_thread_pool = sync_to_async(_run, thread_sensitive=False)
+
+
+def thread_pool_view(view):
+    """
+    Асинхронное представление поверх sync-представления view.
+
+    Django 3.2 поддерживает только асинхронные функции-представления,
+    асинхронные методы классов появились в 4.1. Атрибуты view
+    (view_class, csrf_exempt…) переносятся на обёртку.
+    """
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await in_thread_pool(view, request, *args, **kwargs)
+
+    return async_view
+
+
+news_list = thread_pool_view(views.NewsList.as_view())
+# GET — новость с комментариями, POST — новый комментарий.
+news_detail = thread_pool_view(views.NewsDetailView.as_view())
@@ -0,0 +1,152 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.safestring import mark_safe
+
+GENERATION_KEY = 'news:home:generation'
+FRAGMENT_KEY = 'news:home:{generation}'
+STALE_KEY = 'news:home:stale'
+LOCK_SUFFIX = ':lock'
+LOCK_TIMEOUT = 30
+COMMENT_HTML_KEY = 'news:comment:{pk}:{version}:html'
+
+
+def get_cache():
+    """Бэкенд кэша задаётся алиасом NEWS_HOME_CACHE_ALIAS в настройках."""
+    return caches[settings.NEWS_HOME_CACHE_ALIAS]
+
+
+def get_generation():
+    """
+    Текущее поколение фрагмента главной страницы.
+
+    Поколение меняется при любом изменении новостей и комментариев,
+    то есть самой свежей новости и счётчиков комментариев. Если ключ
+    вытеснен из кэша, начинаем новое поколение, а не старое с нуля.
+    """
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = time.time_ns()
+        if not cache.add(GENERATION_KEY, generation, None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def _bump_generation():
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate_home():
+    """
+    Помечает фрагмент главной страницы устаревшим.
+
+    Поколение сдвигается сразу и ещё раз после коммита транзакции:
+    иначе соседний воркер мог бы успеть собрать фрагмент по данным
+    до коммита и закэшировать его уже под новым поколением.
+    """
+    _bump_generation()
+    transaction.on_commit(_bump_generation)
+
+
+def get_home_fragment(build):
+    """
+    Возвращает HTML списка новостей, собирая его через build() при промахе.
+
+    Защита от «набега»: после инвалидации фрагмент пересобирает только
+    тот воркер, который захватил блокировку, остальные отдают последнюю
+    собранную версию. Если её нет, собирают фрагмент сами, но в кэш
+    не пишут.
+    """
+    cache = get_cache()
+    key = FRAGMENT_KEY.format(generation=get_generation())
+    html = cache.get(key)
+    if html is not None:
+        return mark_safe(html)
+    if cache.add(key + LOCK_SUFFIX, True, LOCK_TIMEOUT):
+        try:
+            html = build()
+            cache.set(key, html, settings.NEWS_HOME_CACHE_TIMEOUT)
+            cache.set(STALE_KEY, html, None)
+        finally:
+            cache.delete(key + LOCK_SUFFIX)
+        return mark_safe(html)
+    html = cache.get(STALE_KEY)
+    if html is None:
+        html = build()
+    return mark_safe(html)
+
+
+def get_comment_cache():
+    """Отдельный ограниченный по размеру кэш: COMMENT_HTML_CACHE_ALIAS."""
+    return caches[settings.COMMENT_HTML_CACHE_ALIAS]
+
+
+def _comment_key(pk, version):
+    return COMMENT_HTML_KEY.format(pk=pk, version=version)
+
+
+def get_comments_html(comments, render):
+    """
+    HTML текстов комментариев: {pk: html}.
+
+    Ключ — (pk, version): правка комментария сдвигает версию, и старая
+    запись просто перестаёт читаться, пока её не вытеснит более свежая.
+    Читается одним get_many, промахи рисует render(comment) и кладёт
+    одним set_many.
+    """
+    cache = get_comment_cache()
+    keys = {
+        _comment_key(comment.pk, comment.version): comment
+        for comment in comments
+    }
+    cached = cache.get_many(keys)
+    missing = {
+        key: render(comment)
+        for key, comment in keys.items() if key not in cached
+    }
+    if missing:
+        cache.set_many(missing, settings.COMMENT_HTML_CACHE_TIMEOUT)
+    comment_cache_stats.record(len(cached), len(missing))
+    cached.update(missing)
+    return {
+        comment.pk: mark_safe(cached[key]) for key, comment in keys.items()
+    }
+
+
+def delete_comment_html(pk, version):
+    get_comment_cache().delete(_comment_key(pk, version))
+
+
+class CacheStats:
+    """Счётчики попаданий в кэш в пределах процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def record(self, hits, misses):
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    def info(self):
+        """hits, misses и доля попаданий — для мониторинга."""
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+        }
+
+
+comment_cache_stats = CacheStats()
@@ -2,6 +2,7 @@ from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import ReloadableMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +11,13 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = ReloadableMatcher(BAD_WORDS)
+
+
+def contains_bad_words(text):
+    """Есть ли в тексте слова из BAD_WORDS или из BAD_WORDS_FILE."""
+    return bad_words.search(text)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +28,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if contains_bad_words(text):
+            raise ValidationError(WARNING)
         return text
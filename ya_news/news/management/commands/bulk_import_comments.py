@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.services import FORMATS, bulk_import_comments, read_records
+
+
+class Command(BaseCommand):
+    help = 'Загружает комментарии из файла JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу с комментариями.')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк вставлять одной транзакцией.',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Не удалось определить формат файла {path}, '
+                f'укажите --format.'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        with path.open(encoding='utf-8', newline='') as stream:
+            report = bulk_import_comments(
+                read_records(stream, file_format), options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено: {report.imported}, пропущено: {report.skipped}, '
+            f'{report.seconds:.2f} с, {report.rows_per_second} строк/с'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from news import search
+
+
+class Command(BaseCommand):
+    help = 'Пересоздаёт поисковый индекс новостей и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Алиас базы данных.',
+        )
+
+    def handle(self, *args, **options):
+        if search.rebuild(options['database']):
+            self.stdout.write(self.style.SUCCESS('Индекс FTS5 пересоздан.'))
+        else:
+            self.stdout.write(
+                'Индекс поддерживает сама база или FTS5 недоступен, '
+                'пересоздавать нечего.'
+            )
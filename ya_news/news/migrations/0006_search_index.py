@@ -0,0 +1,63 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# Таблицы FTS5 для SQLite и GIN-индексы для PostgreSQL. Выражение
+# индекса повторяет postgres_vector из news.search.
+FTS_TABLES = (
+    ('news_news_fts', 'news_news', ('title', 'text')),
+    ('news_comment_fts', 'news_comment', ('text',)),
+)
+TOKENIZER = 'unicode61 remove_diacritics 2'
+
+
+def search_vector(fields):
+    vector = " || ' ' || ".join(
+        f'COALESCE("{field}", \'\')' for field in fields
+    )
+    return f"to_tsvector('russian'::regconfig, {vector})"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for fts_table, table, fields in FTS_TABLES:
+            columns = ', '.join(fields)
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'CREATE INDEX {table}_search_idx ON {table} USING gin '
+                    f'({search_vector(fields)})'
+                )
+            elif connection.vendor == 'sqlite':
+                try:
+                    cursor.execute(
+                        f'CREATE VIRTUAL TABLE {fts_table} USING '
+                        f'fts5({columns}, tokenize="{TOKENIZER}")'
+                    )
+                except OperationalError:
+                    # SQLite собран без FTS5: поиск работает без индекса.
+                    return
+                cursor.execute(
+                    f'INSERT INTO {fts_table} (rowid, {columns}) '
+                    f'SELECT id, {columns} FROM {table}'
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for fts_table, table, _ in FTS_TABLES:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+            elif connection.vendor == 'sqlite':
+                cursor.execute(f'DROP TABLE IF EXISTS {fts_table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
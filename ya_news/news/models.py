@@ -1,37 +1,179 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case, Count, F, OuterRef, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Не перезаписываем счётчик комментариев при обновлении новости.
+
+        Счётчик меняется только атомарными UPDATE, поэтому значение
+        из загруженного ранее объекта может быть устаревшим.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comment_count'
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def recount_comments(cls, queryset=None):
+        """
+        Пересчитывает счётчик комментариев одним UPDATE.
+
+        Нужен после массовых операций, которые обходят Comment.save
+        и Comment.delete: QuerySet.delete(), bulk_create() и т.п.
+        """
+        from .cache import invalidate_home
+
+        if queryset is None:
+            queryset = cls.objects.all()
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        updated = queryset.update(
+            comment_count=Coalesce(Subquery(counts), 0)
+        )
+        invalidate_home()
+        return updated
+
+    @classmethod
+    def add_comment_counts(cls, counts, chunk_size=300):
+        """
+        Увеличивает счётчики по словарю {news_id: сколько добавлено}.
+
+        Один UPDATE с CASE на chunk_size новостей вместо запроса
+        на каждую новость.
+        """
+        from .cache import invalidate_home
+
+        counts = list(counts.items())
+        for start in range(0, len(counts), chunk_size):
+            chunk = dict(counts[start:start + chunk_size])
+            cls.objects.filter(pk__in=chunk).update(
+                comment_count=F('comment_count') + Case(
+                    *(When(pk=pk, then=Value(count))
+                      for pk, count in chunk.items()),
+                    default=Value(0),
+                )
+            )
+        invalidate_home()
+
 
 class Comment(models.Model):
+    # Одиночные индексы по внешним ключам не нужны: их заменяют
+    # составные индексы из Meta.indexes с тем же первым полем.
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    # Растёт при каждой правке: по паре (pk, version) кэшируется HTML.
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+            models.Index(
+                fields=('author', 'created'),
+                name='comment_author_created_idx',
+            ),
+            # Список комментариев в админке без фильтра по новости.
+            models.Index(
+                fields=('created', 'id'), name='comment_created_id_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминаем загруженный текст, чтобы save() заметил правку."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_text = instance.__dict__.get('text')
+        return instance
+
+    def _text_changed(self):
+        return (
+            not self._state.adding
+            and 'text' in self.__dict__
+            and self.text != getattr(self, '_loaded_text', None)
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        Новый комментарий увеличивает счётчик у новости.
+
+        Правка текста, откуда бы она ни пришла, сдвигает version в том
+        же UPDATE: старый HTML в кэше перестаёт читаться. Любое
+        сохранение сдвигает News.updated_at: по нему проверяется
+        актуальность закэшированной страницы новости.
+        """
+        changes = {'updated_at': timezone.now()}
+        if self._state.adding:
+            changes['comment_count'] = F('comment_count') + 1
+        bump = self._text_changed()
+        if bump:
+            self.version = F('version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            News.objects.filter(pk=self.news_id).update(**changes)
+        if bump:
+            self.refresh_from_db(fields=['version'])
+        self._loaded_text = self.text
+
+    def delete(self, *args, **kwargs):
+        """Удалённый комментарий уменьшает счётчик у новости."""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            News.objects.filter(pk=self.news_id).update(
+                updated_at=timezone.now(),
+                comment_count=Greatest(F('comment_count') - 1, 0),
+            )
+        return result
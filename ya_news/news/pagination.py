@@ -0,0 +1,78 @@
+import base64
+import json
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по ключу вместо OFFSET.
+
+    Курсор кодирует значения полей сортировки последнего объекта
+    страницы, поэтому любая страница стоит столько же, сколько первая:
+    запрос идёт по составному индексу с тем же порядком полей.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.ordering = ordering
+        self.per_page = per_page
+        self.queryset = queryset.order_by(*ordering)
+        self.fields = [
+            queryset.model._meta.get_field(
+                'id' if name.lstrip('-') == 'pk' else name.lstrip('-')
+            )
+            for name in ordering
+        ]
+
+    def page(self, cursor=None):
+        """Ленивый QuerySet со страницей, следующей за курсором."""
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode(cursor)))
+        return queryset[:self.per_page]
+
+    def next_cursor(self, page):
+        """Курсор следующей страницы или None, если она пуста."""
+        objects = list(page)
+        if len(objects) < self.per_page:
+            return None
+        last = objects[-1]
+        values = [field.value_from_object(last) for field in self.fields]
+        if not self.queryset.filter(self._after(values)).exists():
+            return None
+        return self.encode(values)
+
+    def encode(self, values):
+        raw = json.dumps([
+            field.get_prep_value(value) if field.primary_key
+            else value.isoformat()
+            for field, value in zip(self.fields, values)
+        ])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        """Разбирает курсор; на любой мусор отвечаем 404, как Paginator."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if len(raw) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, raw)
+            ]
+        except (BinasciiError, TypeError, ValueError, ValidationError):
+            raise Http404('Некорректный курсор.')
+
+    def _after(self, values):
+        """Условие «строго после values» в порядке сортировки."""
+        condition = Q()
+        equal = {}
+        for name, field, value in zip(self.ordering, self.fields, values):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field.name}__{lookup}': value})
+            equal[field.name] = value
+        return condition
@@ -0,0 +1,98 @@
+import os
+import re
+
+from django.conf import settings
+
+END = ''
+
+
+def build_pattern(words):
+    """
+    Собирает из слов одно регулярное выражение.
+
+    Слова складываются в префиксное дерево, и оно переводится
+    в регэксп с общими префиксами: проверка текста идёт за один
+    проход, а не по проходу на каждое слово.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[END] = {}
+    return re.compile(_node_pattern(trie))
+
+
+def _node_pattern(node):
+    # Ищем вхождение подстроки: если здесь кончается слово,
+    # более длинные продолжения уже ничего не добавляют.
+    if END in node:
+        return ''
+    leaves = [char for char, child in node.items() if END in child]
+    branches = [
+        re.escape(char) + _node_pattern(child)
+        for char, child in sorted(node.items())
+        if END not in child
+    ]
+    if leaves:
+        branches.append(
+            re.escape(leaves[0]) if len(leaves) == 1
+            else '[' + ''.join(map(re.escape, sorted(leaves))) + ']'
+        )
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+class BadWordsMatcher:
+    """Проверка текста на запрещённые слова без учёта регистра."""
+
+    def __init__(self, words):
+        words = {word.strip().lower() for word in words}
+        words.discard('')
+        self.size = len(words)
+        self.pattern = build_pattern(words) if words else None
+
+    def search(self, text):
+        if self.pattern is None:
+            return False
+        return self.pattern.search(text.lower()) is not None
+
+
+class ReloadableMatcher:
+    """
+    Матчер по встроенному списку и файлу из settings.BAD_WORDS_FILE.
+
+    В файле одно слово на строке, строки с # пропускаются. Файл
+    перечитывается, как только меняется время его изменения, так что
+    список можно обновлять без перезапуска сервера.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        self.matcher = None
+        self.version = None
+
+    def search(self, text):
+        path = getattr(settings, 'BAD_WORDS_FILE', None)
+        version = (path, self._mtime(path))
+        if self.matcher is None or version != self.version:
+            self.reload(path)
+            self.version = version
+        return self.matcher.search(text)
+
+    def reload(self, path=None):
+        words = list(self.words)
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                words.extend(
+                    line for line in file if not line.startswith('#')
+                )
+        self.matcher = BadWordsMatcher(words)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns if path else None
+        except OSError:
+            return None
@@ -4,14 +4,160 @@ from datetime import datetime, timedelta
 # Сторонние библиотеки
 import pytest
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.test import Client
 from django.utils import timezone
 
 # Местные приложения
+from news import search
 from news.models import News, Comment
+from . import nplusone
 
 
 TEXT_COMMENT = 'Текст комментария'
 NEW_TEXT_COMMENT = {'text': 'Новый текст'}
+AUTHOR_USERNAME = 'Автор'
+# Совпадает с именем из фикстуры admin_user pytest-django.
+ADMIN_USERNAME = 'admin'
+
+# Регулярные выражения повторяющихся запросов, которые не N+1 и
+# разрешены во всех тестах.
+NPLUSONE_ALLOWLIST = ()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'allow_nplusone(*patterns): разрешить повторы запросов, '
+        'подходящих под patterns; без аргументов — не проверять N+1.',
+    )
+
+
+@pytest.fixture(autouse=True)
+def detect_nplusone(request, monkeypatch):
+    """
+    Каждый запрос тестового клиента проверяется на N+1.
+
+    Повторы, которые нужны намеренно, разрешаются маркером
+    @pytest.mark.allow_nplusone(pattern, ...) или NPLUSONE_ALLOWLIST.
+    """
+    marker = request.node.get_closest_marker('allow_nplusone')
+    if marker is not None and not marker.args:
+        return
+    allowlist = NPLUSONE_ALLOWLIST + (marker.args if marker else ())
+    send = Client.request
+
+    def checked_request(client, **environ):
+        with nplusone.detect(environ['PATH_INFO'], allowlist):
+            return send(client, **environ)
+
+    monkeypatch.setattr(Client, 'request', checked_request)
+
+
+def session_user(username):
+    """Несохранённый пользователь из общих для сессии."""
+    User = get_user_model()
+    if username == ADMIN_USERNAME:
+        return User(
+            username=username, email='admin@example.com',
+            password=make_password('password'),
+            is_staff=True, is_superuser=True,
+        )
+    return User(username=username)
+
+
+def get_session_user(username):
+    """Общий для сессии пользователь; пропавший создаётся заново."""
+    user = get_user_model().objects.filter(username=username).first()
+    if user is None:
+        user = session_user(username)
+        user.save()
+    return user
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """
+    Пользователи, общие для всех тестов, создаются один раз за сессию.
+
+    Каждый тест идёт в транзакции с откатом, поэтому эти строки его
+    переживают. Тест с transactional_db в конце очищает таблицы, и
+    после него фикстуры author и admin_user создают пользователя
+    заново в своей транзакции. В конце сессии пользователи удаляются,
+    чтобы не остаться в базе, переиспользуемой через --reuse-db.
+    """
+    usernames = (AUTHOR_USERNAME, ADMIN_USERNAME)
+    users = get_user_model().objects.filter(username__in=usernames)
+    with django_db_blocker.unblock():
+        users.delete()
+        users.bulk_create(
+            session_user(username) for username in usernames
+        )
+    yield
+    with django_db_blocker.unblock():
+        users.delete()
+
+
+def last_pk(model):
+    return model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+
+
+def make_news(count):
+    """
+    count новостей одним bulk_create, каждая следующая на день старше.
+
+    bulk_create не отправляет сигналов, поэтому поисковый индекс
+    пополняется одним index_after. Возвращает новости в порядке
+    создания: SQLite в Django 3.2 не возвращает pk из bulk_create.
+    """
+    start, today = last_pk(News), datetime.today()
+    News.objects.bulk_create(
+        News(
+            title=f'Новость {index}',
+            text='Текст новости',
+            date=today - timedelta(days=index),
+        )
+        for index in range(count)
+    )
+    search.index_after(News, start)
+    return list(News.objects.filter(pk__gt=start).order_by('pk'))
+
+
+def make_comments(news, author, count):
+    """
+    count комментариев одним bulk_create, каждый следующий на день позже.
+
+    created с auto_now_add перезаписывается при вставке, поэтому
+    проставляется отдельным bulk_update. Счётчик новости пересчитывается.
+    """
+    start, now = last_pk(Comment), timezone.now()
+    Comment.objects.bulk_create(
+        Comment(text=f'Текст {index}', news=news, author=author)
+        for index in range(count)
+    )
+    comments = list(Comment.objects.filter(pk__gt=start).order_by('pk'))
+    for index, comment in enumerate(comments):
+        comment.created = now + timedelta(days=index)
+    Comment.objects.bulk_update(comments, ('created',))
+    search.index_after(Comment, start)
+    News.recount_comments(News.objects.filter(pk=news.pk))
+    return comments
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Кэш переживает откат транзакции теста, поэтому чистим его.
+
+    После отката SQLite выдаёт те же pk, и ключ (pk, version) иначе
+    достался бы чужому комментарию.
+    """
+    caches[settings.NEWS_HOME_CACHE_ALIAS].clear()
+    caches[settings.COMMENT_HTML_CACHE_ALIAS].clear()
 
 
 @pytest.fixture
@@ -21,9 +167,18 @@ def new_text_comment():
 
 
 @pytest.fixture
-def author(django_user_model):
-    """Создаём пользователя."""
-    return django_user_model.objects.create(username='Автор')
+def author(db):
+    """Автор из общих для сессии пользователей."""
+    return get_session_user(AUTHOR_USERNAME)
+
+
+@pytest.fixture
+def admin_user(db):
+    """
+    Администратор из общих для сессии пользователей: фикстура
+    pytest-django хеширует пароль заново в каждом тесте.
+    """
+    return get_session_user(ADMIN_USERNAME)
 
 
 @pytest.fixture
@@ -60,28 +215,10 @@ def comment(news, author):
 @pytest.fixture
 def list_news():
     """Создаём список новостей."""
-    today, list_news = datetime.today(), []
-    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE):
-        news = News.objects.create(
-            title=f'Новость {index}',
-            text='Текст новости',
-        )
-        news.date = today - timedelta(days=index)
-        news.save()
-        list_news.append(news)
-    return list_news
+    return make_news(settings.NEWS_COUNT_ON_HOME_PAGE)
 
 
 @pytest.fixture
 def list_comments(news, author):
     """Создаём список комментариев."""
-    now, list_comment = timezone.now(), []
-    for index in range(2):
-        comment = Comment.objects.create(
-            text=f'Текст {index}',
-            news=news,
-            author=author,
-        )
-        comment.created = now + timedelta(days=index)
-        comment.save()
-        list_comment.append(comment)
+    return make_comments(news, author, 2)
@@ -1,8 +1,18 @@
+from datetime import timedelta
+from http import HTTPStatus
+from importlib import import_module
+from pathlib import Path
+
 from django.conf import settings
+from django.db import connection
 from django.urls import reverse
 import pytest
 
+from .. import search
+from ..cache import COMMENT_HTML_KEY, comment_cache_stats, get_comment_cache
 from ..forms import CommentForm
+from ..models import Comment, News
+from ..warmup import warm_up_templates
 
 
 @pytest.mark.django_db
@@ -50,9 +60,133 @@ def test_comments_order(client, news, list_comments):
 @pytest.mark.django_db
 def test_anonymous_client_has_no_form(parametrized_client, status, comment):
     """Анонимному пользователю недоступна форма для отправки комментария."""
-    url = reverse("news:detail", args=(comment.id,))
+    url = reverse("news:detail", args=(comment.news.id,))
     response = parametrized_client.get(url)
     has_form = "form" in response.context and isinstance(
         response.context["form"], CommentForm
     )
     assert has_form is status
+
+
+@pytest.mark.django_db
+def test_news_next_page_by_cursor(client, list_news):
+    """Более ранние новости открываются по курсору ?after=."""
+    older = News.objects.create(
+        title="Старая новость",
+        text="Текст",
+        date=list_news[-1].date - timedelta(days=1),
+    )
+    url = reverse("news:home")
+    response = client.get(url)
+    cursor = response.context["next_cursor"]
+    assert cursor
+    response = client.get(url, {"after": cursor})
+    assert list(response.context["object_list"]) == [older]
+    assert response.context["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_bad_cursor_returns_not_found(client):
+    """Некорректный курсор — ошибка 404."""
+    response = client.get(reverse("news:home"), {"after": "мусор"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comments_next_page_by_cursor(client, settings, news, list_comments):
+    """Комментарии новости выводятся страницами."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    url = reverse("news:detail", args=(news.id,))
+    response = client.get(url)
+    assert list(response.context["comments"]) == list_comments[:1]
+    response = client.get(url, {"after": response.context["next_cursor"]})
+    assert list(response.context["comments"]) == list_comments[1:]
+    assert response.context["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_home_fragment_is_cached_and_invalidated(
+        client, django_assert_num_queries, list_news, author
+):
+    """Главная берётся из кэша, пока не изменятся новости."""
+    url = reverse("news:home")
+    client.get(url)
+    with django_assert_num_queries(0):
+        client.get(url)
+    Comment.objects.create(news=list_news[0], author=author, text="Новый")
+    response = client.get(url)
+    assert "Комментариев: 1" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_search_finds_word_forms(client, author):
+    """Поиск находит новости и комментарии по другой форме слова."""
+    news = News.objects.create(
+        title="Новости мобильной разработки", text="Текст"
+    )
+    Comment.objects.create(news=news, author=author, text="Отличная новость")
+    News.objects.create(title="Погода", text="Дожди")
+    response = client.get(reverse("news:search"), {"q": "новость"})
+    assert list(response.context["news_list"]) == [news]
+    assert [
+        comment.text for comment in response.context["comments"]
+    ] == ["Отличная новость"]
+
+
+@pytest.mark.django_db
+def test_fts_missing_table_is_not_remembered(monkeypatch):
+    """Таблица FTS5, созданная позже, находится на том же соединении."""
+    monkeypatch.delattr(connection, '_news_fts_enabled', raising=False)
+    with monkeypatch.context() as patch:
+        patch.setattr(
+            connection.introspection, 'table_names', lambda: []
+        )
+        assert not search.fts_enabled(connection)
+    assert search.fts_enabled(connection)
+
+
+def test_postgres_search_uses_index_expression(monkeypatch):
+    """Запрос PostgreSQL повторяет выражение GIN-индекса из миграции."""
+    pytest.importorskip('psycopg2')
+    migration = import_module('news.migrations.0006_search_index')
+    monkeypatch.setattr(connection, 'vendor', 'postgresql')
+    for model, (_, fields) in search.INDEXES.items():
+        sql = str(search.search(model.objects.all(), 'новости').query)
+        assert migration.search_vector(fields) in sql.replace(
+            f'"{model._meta.db_table}".', ''
+        )
+
+
+def test_comment_body_cache(author_client, author, comment, news):
+    """Текст и ссылки комментария готовятся заранее, правка видна сразу."""
+    url = reverse("news:detail", args=(news.id,))
+    author_client.get(url)
+    comment.text = "Первая строка\nвторая & третья"
+    comment.save()
+    assert comment.version == 2
+    response = author_client.get(url)
+    html = response.content.decode()
+    assert "Первая строка<br>вторая &amp; третья" in html
+    assert reverse("news:edit", args=(comment.id,)) in html
+    assert reverse("news:delete", args=(comment.id,)) in html
+    author_client.post(
+        reverse("news:edit", args=(comment.id,)), {"text": "Исправлено"}
+    )
+    response = author_client.get(url)
+    assert "Исправлено" in response.content.decode()
+    comment.refresh_from_db()
+    assert comment.version == 3
+    hits = comment_cache_stats.info()["hits"]
+    author_client.get(url)
+    assert comment_cache_stats.info()["hits"] == hits + 1
+    author_client.post(reverse("news:delete", args=(comment.id,)))
+    assert not get_comment_cache().get_many(
+        [COMMENT_HTML_KEY.format(pk=comment.id, version=3)]
+    )
+
+
+def test_warm_up_templates():
+    """Прогрев компилирует все шаблоны проекта."""
+    templates = list(Path(settings.TEMPLATES[0]['DIRS'][0]).rglob('*.html'))
+    compiled, _ = warm_up_templates()
+    assert compiled == len(templates)
@@ -1,15 +1,26 @@
 # Стандартная библиотека
+import json
+import os
+from datetime import date
 from http import HTTPStatus
 
 # Сторонние библиотеки
 import pytest
+from django.core.management import call_command
+from django.db import connection, router
+from django.http import HttpResponse
 from django.urls import reverse
 from pytest_django.asserts import assertRedirects, assertFormError
 
 # Локальные импорты приложения
 from .conftest import TEXT_COMMENT
+from news.db import replica_reads
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.middleware import PIN_COOKIE, PrimaryPinningMiddleware
+from news.models import Comment, News
+from news.pagination import KeysetPaginator
+from news.signals import apply_sqlite_pragmas
+from news.views import NewsList
 
 
 @pytest.mark.django_db
@@ -99,3 +110,135 @@ def test_user_cant_edit_comment_of_another_user(
     assert response.status_code == HTTPStatus.NOT_FOUND
     fresh_comment = Comment.objects.get(pk=comment.pk)
     assert fresh_comment.text == TEXT_COMMENT  # текст не изменился
+
+
+def test_comment_count_follows_create_and_delete(author_client, news):
+    """Счётчик комментариев меняется при создании и удалении."""
+    url = reverse("news:detail", args=(news.id,))
+    author_client.post(url, data={"text": "Первый"})
+    author_client.post(url, data={"text": "Второй"})
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    comment = Comment.objects.filter(news=news).first()
+    author_client.post(reverse("news:delete", args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_recount_comments_fixes_counter(news, comment):
+    """Пересчёт восстанавливает счётчик после массовых операций."""
+    News.objects.filter(pk=news.pk).update(comment_count=100)
+    News.recount_comments()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_bulk_import_comments(tmp_path, news, author):
+    """Массовая загрузка пропускает ругательства и битые строки."""
+    Comment.objects.all().delete()
+    records = [
+        {"news": news.id, "author": author.id, "text": "Первый"},
+        {"news": news.id, "author": author.id, "text": BAD_WORDS[0]},
+        {"news": news.id + 1, "author": author.id, "text": "Нет новости"},
+        {"news": news.id, "author": author.id, "text": "Второй"},
+    ]
+    path = tmp_path / "comments.jsonl"
+    path.write_text(
+        "\n".join(json.dumps(record) for record in records) + "\n{битая",
+        encoding="utf-8",
+    )
+    call_command("bulk_import_comments", str(path), batch_size=2)
+    assert list(
+        Comment.objects.values_list("text", flat=True)
+    ) == ["Первый", "Второй"]
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+
+def test_bad_words_file_is_reloaded(author_client, settings, tmp_path, news):
+    """Список запрещённых слов из файла подхватывается без перезапуска."""
+    Comment.objects.all().delete()
+    path = tmp_path / "bad_words.txt"
+    path.write_text("# модерация\n", encoding="utf-8")
+    settings.BAD_WORDS_FILE = str(path)
+    url = reverse("news:detail", args=(news.id,))
+    author_client.post(url, data={"text": "Ну ты и Бяка"})
+    assert Comment.objects.count() == 1
+    path.write_text("бяк\n", encoding="utf-8")
+    # Файл перечитывается по mtime: на ФС с грубыми отметками времени
+    # обе записи попали бы в одну.
+    mtime = path.stat().st_mtime
+    os.utime(path, (mtime, mtime + 1))
+    response = author_client.post(url, data={"text": "Ну ты и Бяка"})
+    assertFormError(response, form="form", field="text", errors=WARNING)
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.parametrize(
+    'method, cookies, expected',
+    (
+        ('get', {}, 'replica'),
+        ('post', {}, 'default'),
+        ('get', {PIN_COOKIE: '1'}, 'default'),
+    ),
+)
+def test_replica_routing(rf, settings, method, cookies, expected):
+    """Из реплики читают только GET без недавней записи."""
+    settings.DATABASE_REPLICAS = ['replica']
+    used = []
+
+    def view(request):
+        used.append(router.db_for_read(News))
+        return HttpResponse()
+
+    view.replica_reads = True
+    middleware = PrimaryPinningMiddleware(
+        lambda request: middleware.process_view(request, view, (), {})
+        or view(request)
+    )
+    request = getattr(rf, method)('/')
+    request.COOKIES.update(cookies)
+    response = middleware(request)
+    assert used == [expected]
+    assert (PIN_COOKIE in response.cookies) == (method == 'post')
+    assert router.db_for_read(News) == 'default'
+
+
+@pytest.mark.parametrize('next_page', (False, True))
+def test_home_fragment_reads_primary(rf, settings, next_page):
+    """Кэшируемая первая страница собирается из primary, а не из реплики."""
+    settings.DATABASE_REPLICAS = ['replica']
+    query = {}
+    if next_page:
+        query['after'] = KeysetPaginator(
+            News.objects.all(), ('-date', '-pk'), 1
+        ).encode([date.today(), 1])
+    view = NewsList()
+    view.setup(rf.get('/', query))
+    token = replica_reads.set({'allowed': True})
+    try:
+        assert view.get_queryset().db == (
+            'replica' if next_page else 'default'
+        )
+    finally:
+        replica_reads.reset(token)
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas(settings):
+    """Настройки SQLite применяются к новому соединению."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        cache_size = cursor.fetchone()[0]
+    settings.SQLITE_PRAGMAS = {'cache_size': -1234}
+    try:
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            assert cursor.fetchone()[0] == -1234
+    finally:
+        # Соединение общее для всех тестов сессии.
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA cache_size = {cache_size}')
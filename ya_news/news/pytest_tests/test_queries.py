@@ -0,0 +1,153 @@
+# Стандартная библиотека
+import json
+from http import HTTPStatus
+
+# Сторонние библиотеки
+import pytest
+from django.db import connection
+from django.template import engines
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Локальные импорты приложения
+from news import instrumentation
+from news.instrumentation import route_stats
+from news.models import Comment, News
+from . import nplusone
+from .conftest import NEW_TEXT_COMMENT
+
+# Сессия и пользователь, загрузка объекта, SAVEPOINT, запись
+# комментария, запись в поисковый индекс, UPDATE новости (счётчик
+# и updated_at), RELEASE SAVEPOINT.
+# SAVEPOINT появляется только внутри транзакции теста, вне её это
+# BEGIN/COMMIT, которые в connection.queries не попадают.
+WRITE_QUERIES = 8
+# Правка текста перечитывает version, сдвинутую через F() в UPDATE.
+EDIT_EXTRA_QUERIES = 1
+# Сессия, пользователь, SAVEPOINT, новость, тип содержимого для
+# журнала действий, RELEASE SAVEPOINT — ни одного на комментарий.
+ADMIN_CHANGE_QUERIES = 6
+
+
+@pytest.mark.parametrize(
+    'name, fixture_name, queries',
+    (
+        ('news:detail', 'news', WRITE_QUERIES),
+        ('news:edit', 'comment', WRITE_QUERIES + EDIT_EXTRA_QUERIES),
+        ('news:delete', 'comment', WRITE_QUERIES),
+    ),
+)
+def test_comment_write_queries(
+        author_client, django_assert_num_queries, request, name, fixture_name,
+        queries,
+):
+    """Запись комментария выполняет фиксированное число запросов."""
+    obj = request.getfixturevalue(fixture_name)
+    url = reverse(name, args=(obj.id,))
+    with django_assert_num_queries(queries):
+        response = author_client.post(url, data=NEW_TEXT_COMMENT)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_admin_news_change_page(
+        admin_client, django_assert_max_num_queries, news, list_comments
+):
+    """Страница новости в админке не зависит от числа комментариев."""
+    url = reverse('admin:news_news_change', args=(news.id,))
+    with django_assert_max_num_queries(ADMIN_CHANGE_QUERIES):
+        response = admin_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert f'news__id__exact={news.id}' in response.content.decode()
+
+
+def test_admin_comment_bulk_delete(admin_client, news, list_comments):
+    """Удаление комментариев из списка в админке пересчитывает счётчик."""
+    keep, *delete = list_comments
+    admin_client.post(reverse('admin:news_comment_changelist'), {
+        'action': 'delete_selected',
+        '_selected_action': [comment.id for comment in delete],
+        'post': 'yes',
+    })
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_request_metrics(
+        settings, client, admin_client, author_client, news, list_comments,
+        caplog, request,
+):
+    """Замеры совпадают с фактическим числом запросов и копятся по маршруту."""
+    # Middleware ставит счётчик на соединения, общие с другими тестами.
+    request.addfinalizer(instrumentation.disable)
+    settings.REQUEST_METRICS = True
+    route_stats.clear()
+    url = reverse('news:detail', args=(news.id,))
+    with CaptureQueriesContext(connection) as queries:
+        with caplog.at_level('INFO', logger='news.metrics'):
+            response = client.get(url)
+    assert f'desc="{len(queries)} queries"' in response['Server-Timing']
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['route'] == 'news:detail'
+    assert record['queries'] == len(queries)
+    assert record['template_ms'] > 0
+    metrics_url = reverse('news:metrics')
+    assert author_client.get(metrics_url).status_code == HTTPStatus.FORBIDDEN
+    routes = admin_client.get(metrics_url).json()['routes']
+    assert routes['news:detail']['count'] == 1
+    assert set(routes['news:detail']['total_ms']) == {'p50', 'p95', 'p99'}
+
+
+@pytest.mark.django_db
+def test_request_metrics_disabled(client, news):
+    """Без REQUEST_METRICS middleware выключена целиком."""
+    response = client.get(reverse('news:detail', args=(news.id,)))
+    assert 'Server-Timing' not in response
+
+
+@pytest.mark.django_db
+def test_nplusone_detector(list_comments):
+    """Автор в цикле без select_related — N+1 со строкой шаблона."""
+    template = engines['django'].from_string(
+        '{% for comment in comments %}\n{{ comment.author }}\n{% endfor %}'
+    )
+    with pytest.raises(nplusone.NPlusOneError) as error:
+        with nplusone.detect('/'):
+            template.render({'comments': Comment.objects.all()})
+    assert '2 × SELECT' in str(error.value)
+    assert ':2 {{ comment.author }}' in str(error.value)
+    assert 'Comment.author' in str(error.value)
+    with nplusone.detect('/', allowlist=('"auth_user"',)):
+        template.render({'comments': Comment.objects.all()})
+
+
+@pytest.mark.django_db
+def test_nplusone_collapses_bulk_rows():
+    """Пачки bulk_create разной длины — одна форма запроса."""
+    assert nplusone.shape(
+        'INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'
+    ) == nplusone.shape('INSERT INTO "t" ("a", "b") VALUES (%s, %s)')
+    with pytest.raises(nplusone.NPlusOneError) as error:
+        with nplusone.detect('/'):
+            News.objects.bulk_create(
+                (News(title=f'Новость {index}', text='Текст')
+                 for index in range(3)),
+                batch_size=2,
+            )
+    assert '2 × INSERT INTO "news_news"' in str(error.value)
+
+
+# Пользователь сессии и проверка поля author — два одинаковых запроса.
+@pytest.mark.allow_nplusone(r'FROM "auth_user" WHERE "auth_user"."id" = %s')
+def test_admin_comment_news_is_read_only(admin_client, author, comment):
+    """Комментарий нельзя перенести в другую новость через админку."""
+    other = News.objects.create(title='Другая', text='Текст')
+    url = reverse('admin:news_comment_change', args=(comment.id,))
+    response = admin_client.post(
+        url, {'news': other.id, 'author': author.id, 'text': 'Правка'}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    comment.refresh_from_db()
+    assert comment.news_id != other.id
+    assert comment.text == 'Правка'
+    counts = dict(News.objects.values_list('id', 'comment_count'))
+    assert counts == {comment.news_id: 1, other.id: 0}
@@ -3,10 +3,13 @@ from http import HTTPStatus
 
 # Библиотеки сторонних разработчиков
 import pytest
+from asgiref.sync import async_to_sync
 from pytest_django.asserts import assertRedirects
 
 # Локальные импорты
+from django.contrib.auth.models import AnonymousUser
 from django.urls import reverse
+from news import async_views
 
 
 @pytest.mark.django_db
@@ -61,3 +64,30 @@ def test_redirect_for_anonymous_client(client, name, comment):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.django_db
+def test_detail_page_not_modified(client, author, news):
+    """Неизменившаяся страница новости отдаётся ответом 304."""
+    url = reverse('news:detail', args=(news.id,))
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    news.comment_set.create(author=author, text='Новый комментарий')
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    'view, with_pk',
+    ((async_views.news_list, False), (async_views.news_detail, True)),
+)
+def test_async_views(rf, news, view, with_pk):
+    """Асинхронные страницы работают из пула потоков."""
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    kwargs = {'pk': news.pk} if with_pk else {}
+    response = async_to_sync(view)(request, **kwargs)
+    assert response.status_code == HTTPStatus.OK
+    assert news.title in response.content.decode()
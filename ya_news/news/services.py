@@ -0,0 +1,104 @@
+import csv
+import json
+import time
+from collections import Counter, namedtuple
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import search
+from .forms import contains_bad_words
+from .models import Comment, News
+
+FORMATS = ('jsonl', 'csv')
+
+
+class ImportReport(namedtuple('ImportReport', 'imported skipped seconds')):
+    """Итог загрузки комментариев."""
+
+    @property
+    def rows_per_second(self):
+        rows = self.imported + self.skipped
+        return round(rows / self.seconds) if self.seconds else rows
+
+
+def read_records(stream, file_format):
+    """
+    Построчно читает записи из JSONL или CSV.
+
+    Ожидаются поля news, author (id) и text. Неразборчивая строка
+    JSONL отдаётся как None и считается пропущенной.
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _existing(model, ids):
+    return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def _build_comments(records):
+    """
+    Проверяет пачку записей по тем же правилам, что и CommentForm.
+
+    Существование новостей и авторов проверяется одним запросом
+    на пачку для каждой таблицы.
+    """
+    candidates = []
+    for record in records:
+        try:
+            news_id, author_id = int(record['news']), int(record['author'])
+            text = record['text'].strip()
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+        if text and not contains_bad_words(text):
+            candidates.append((news_id, author_id, text))
+    news = _existing(News, {news_id for news_id, _, _ in candidates})
+    authors = _existing(
+        get_user_model(), {author_id for _, author_id, _ in candidates}
+    )
+    return [
+        Comment(news_id=news_id, author_id=author_id, text=text)
+        for news_id, author_id, text in candidates
+        if news_id in news and author_id in authors
+    ]
+
+
+def bulk_import_comments(records, batch_size=1000):
+    """
+    Загружает комментарии пачками через bulk_create.
+
+    Каждая пачка вставляется в своей транзакции вместе с увеличением
+    счётчиков затронутых новостей и добавлением в поисковый индекс.
+    В памяти держится только текущая пачка, поэтому размер входного
+    файла не важен. Поле created получает время загрузки.
+    """
+    imported = skipped = 0
+    start = time.perf_counter()
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        comments = _build_comments(batch)
+        with transaction.atomic():
+            last_pk = Comment.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            ).first() or 0
+            Comment.objects.bulk_create(comments)
+            search.index_after(Comment, last_pk)
+            News.add_comment_counts(
+                Counter(comment.news_id for comment in comments)
+            )
+        imported += len(comments)
+        skipped += len(batch) - len(comments)
+    return ImportReport(imported, skipped, time.perf_counter() - start)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .cache import invalidate_home
+from .models import Comment, News
+
+
+@receiver((post_save, post_delete), sender=News)
+@receiver(post_delete, sender=Comment)
+def invalidate_home_fragment(sender, **kwargs):
+    """Изменились новости или счётчики комментариев — главная устарела."""
+    invalidate_home()
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_home_on_new_comment(sender, created, **kwargs):
+    """Правка текста комментария на главную не влияет, новый — влияет."""
+    if created:
+        invalidate_home()
+
+
+@receiver(post_save, sender=News)
+@receiver(post_save, sender=Comment)
+def update_search_index(sender, instance, using, **kwargs):
+    search.index_object(instance, using)
+
+
+@receiver(post_delete, sender=News)
+@receiver(post_delete, sender=Comment)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    search.unindex_object(instance, using)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Применяет settings.SQLITE_PRAGMAS к каждому новому соединению."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -1,42 +1,132 @@
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db.models import Max
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from . import search
+from .cache import (
+    comment_cache_stats, delete_comment_html, get_home_fragment,
+)
+from .db import PRIMARY
 from .forms import CommentForm
+from .instrumentation import route_stats
 from .models import Comment, News
+from .pagination import KeysetPaginator
+from .rendering import prepare_comments
 
 
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    replica_reads = True
 
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Число комментариев
+        берётся из денормализованного счётчика News.comment_count.
+        Более старые новости доступны по курсору ?after=.
+
+        Первая страница читается из primary: её фрагмент кэшируется под
+        новым поколением, и отстающая реплика закэшировала бы в нём
+        список без только что добавленной новости.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        queryset = self.model.objects.all()
+        if not self.request.GET.get('after'):
+            queryset = queryset.using(PRIMARY)
+        self.keyset = KeysetPaginator(
+            queryset,
+            ('-date', '-pk'),
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+        )
+        return self.keyset.page(self.request.GET.get('after'))
 
+    def get_context_data(self, **kwargs):
+        """
+        Первая страница одинакова для всех посетителей и берётся из кэша.
+
+        При попадании в кэш запросы к новостям не выполняются вовсе.
+        """
+        context = super().get_context_data(**kwargs)
+        if self.request.GET.get('after'):
+            context['news_list'] = self.render_news_list(context)
+        else:
+            context['news_list'] = get_home_fragment(
+                lambda: self.render_news_list(context)
+            )
+        return context
 
+    def render_news_list(self, context):
+        """Фрагмент не зависит от пользователя: рендерим без request."""
+        context['next_cursor'] = self.keyset.next_cursor(self.object_list)
+        return render_to_string('includes/news_list.html', context)
+
+
+def news_validators(request, pk):
+    """
+    Время последнего изменения и число комментариев новости.
+
+    Берутся одним запросом по индексу (news, created) и запоминаются
+    в request: condition() спрашивает ETag и Last-Modified по очереди.
+    """
+    if not hasattr(request, '_news_validators'):
+        request._news_validators = News.objects.filter(pk=pk).annotate(
+            last_comment=Max('comment__created')
+        ).values_list('updated_at', 'last_comment', 'comment_count').first()
+    return request._news_validators
+
+
+def news_last_modified(request, pk, **kwargs):
+    validators = news_validators(request, pk)
+    if validators is None:
+        return None
+    updated_at, last_comment, _ = validators
+    return max(updated_at, last_comment or updated_at)
+
+
+def news_etag(request, pk, **kwargs):
+    """Страница зависит ещё и от пользователя: форма, ссылки на правку."""
+    last_modified = news_last_modified(request, pk)
+    if last_modified is None:
+        return None
+    comment_count = news_validators(request, pk)[2]
+    return '{}-{}-{}-{}'.format(
+        pk, last_modified.timestamp(), comment_count, request.user.pk or 0
+    )
+
+
+@method_decorator(
+    condition(etag_func=news_etag, last_modified_func=news_last_modified),
+    name='get',
+)
 class NewsDetail(generic.DetailView):
     model = News
     template_name = 'news/detail.html'
+    replica_reads = True
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
+        obj = get_object_or_404(self.model, pk=self.kwargs['pk'])
         return obj
 
     def get_context_data(self, **kwargs):
+        """Комментарии выводим страницами по курсору ?after=."""
         context = super().get_context_data(**kwargs)
+        keyset = KeysetPaginator(
+            self.object.comment_set.select_related('author'),
+            ('created', 'pk'),
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        )
+        comments = keyset.page(self.request.GET.get('after'))
+        context['next_cursor'] = keyset.next_cursor(comments)
+        context['comments'] = prepare_comments(comments, self.request.user)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
@@ -63,11 +153,14 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        """Новость уже загружена в post(), повторно её не запрашиваем."""
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    replica_reads = True
 
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
@@ -83,9 +176,13 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """
+        Комментарий уже загружен UpdateView/DeleteView.
+
+        Для адреса достаточно news_id, сама новость не нужна.
+        """
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -102,3 +199,41 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        """После удаления pk объекта сброшен, поэтому берём его из URL."""
+        response = super().delete(request, *args, **kwargs)
+        delete_comment_html(self.kwargs['pk'], self.object.version)
+        return response
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям и комментариям: ?q=."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        if query:
+            context['news_list'] = search.search(
+                News.objects.all(), query
+            )[:settings.SEARCH_RESULTS_COUNT]
+            context['comments'] = search.search(
+                Comment.objects.select_related('author', 'news'), query
+            ).order_by('-created')[:settings.SEARCH_RESULTS_COUNT]
+        return context
+
+
+class RequestMetrics(UserPassesTestMixin, generic.View):
+    """Перцентили замеров по маршрутам и счётчики кэша, только персоналу."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'enabled': settings.REQUEST_METRICS,
+            'routes': route_stats.info(),
+            'comment_cache': comment_cache_stats.info(),
+        })
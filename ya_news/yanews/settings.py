@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.middleware.RequestMetricsMiddleware',
+    'news.middleware.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,6 +51,9 @@ TEMPLATES = [
     },
 ]
 
+# Компилировать шаблоны при запуске, см. settings_production.py.
+TEMPLATE_WARMUP = False
+
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
@@ -55,7 +61,83 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле: с pytest --reuse-db (см. pytest.ini)
+        # она мигрируется один раз и дальше берётся готовой, под xdist
+        # у каждого процесса своя копия с суффиксом _gw0, _gw1…
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+# Реплика для чтения: DJANGO_REPLICA_DB=<путь к SQLite-файлу>. Локально
+# годится копия db.sqlite3; в тестах реплика — зеркало default.
+DATABASE_REPLICAS = []
+if os.getenv('DJANGO_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DJANGO_REPLICA_DB'),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append('replica')
+
+# Профиль SQLite для продакшена: DJANGO_DB_PROFILE=production.
+# WAL позволяет читать во время записи, busy_timeout ждёт блокировку
+# вместо ошибки «database is locked», соединения живут между запросами.
+SQLITE_PRAGMAS = {}
+if os.getenv('DJANGO_DB_PROFILE') == 'production':
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 2 ** 20,
+        # Отрицательное значение — размер в КиБ, а не в страницах.
+        'cache_size': -64 * 2 ** 10,
+    }
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+
+DATABASE_ROUTERS = ['news.db.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает только из primary.
+REPLICA_PIN_SECONDS = 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # HTML текстов комментариев. Размер ограничен, вытесняются давно
+    # не читавшиеся записи; в Redis — maxmemory с allkeys-lru.
+    'comments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'comments',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Кэш фрагмента главной страницы. В продакшене нужен общий для всех
+# воркеров бэкенд: FileBasedCache или Redis-совместимый,
+# например django_redis.cache.RedisCache.
+NEWS_HOME_CACHE_ALIAS = 'default'
+NEWS_HOME_CACHE_TIMEOUT = 300
+
+# HTML текста комментария по ключу (pk, version), см. news/cache.py.
+COMMENT_HTML_CACHE_ALIAS = 'comments'
+COMMENT_HTML_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Замеры запросов, см. news/instrumentation.py: заголовок Server-Timing,
+# лог news.metrics и перцентили по маршрутам на странице news:metrics.
+REQUEST_METRICS = os.getenv('DJANGO_REQUEST_METRICS') == '1'
+# Сколько последних запросов каждого маршрута хранится для перцентилей.
+REQUEST_METRICS_WINDOW = 1000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'news.metrics': {'handlers': ['console'], 'level': 'INFO'},
+    },
 }
 
 
@@ -80,3 +162,14 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 100
+
+SEARCH_RESULTS_COUNT = 20
+
+# Файл с дополнительными запрещёнными словами, по одному на строке.
+# Перечитывается при изменении без перезапуска сервера.
+BAD_WORDS_FILE = None
+
+# Асинхронные страницы чтения для ASGI, см. async_views.py.
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS') == '1'
@@ -0,0 +1,39 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+# Разрешено ли текущему запросу читать из реплики, см. middleware.py.
+replica_reads = ContextVar('notes_replica_reads', default=None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Чтение из реплик settings.DATABASE_REPLICAS, запись — в primary.
+
+    Из реплик читают только GET-запросы к страницам с атрибутом
+    replica_reads (NotesList, NoteDetail…), и только если пользователь
+    недавно ничего не записывал. Из реплик читаются только модели
+    приложения: сессии и пользователи — из primary, вход и выход
+    должны действовать сразу.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = replica_reads.get()
+        if (state and state['allowed'] and settings.DATABASE_REPLICAS
+                and model._meta.app_label == 'notes'):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # Явно: иначе объект, прочитанный из реплики, сохранялся бы в неё.
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схему реплики получают репликацией с primary."""
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.db import connections
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson', 'notes.jsonl'),
+    'zip': ('application/zip', 'notes.zip'),
+}
+FIELDS = ('slug', 'title', 'text', 'updated_at')
+
+
+class _Sink:
+    """
+    Буфер, в который пишет zipfile; записанное сразу отдаётся клиенту.
+
+    Без seek и tell zipfile пишет архив последовательно, с дескрипторами
+    данных после каждого файла, поэтому в памяти лежит только последний
+    кусок.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def chunks(queryset, chunk_size):
+    """Отдаёт строки queryset списками по chunk_size."""
+    rows = queryset.values_list(*FIELDS).iterator(chunk_size=chunk_size)
+    yield from iter(lambda: list(islice(rows, chunk_size)), [])
+
+
+async def achunks(queryset, chunk_size):
+    """
+    chunks для цикла событий: пачки читаются в отдельном потоке, одном
+    на весь ответ, а цикл тем временем обслуживает другие запросы.
+
+    Поток держит своё соединение с базой, которое не закроет конец
+    чужого запроса, и в конце закрывает его.
+    """
+    rows = queryset.values_list(*FIELDS).iterator(chunk_size=chunk_size)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        while True:
+            chunk = await loop.run_in_executor(
+                executor, lambda: list(islice(rows, chunk_size))
+            )
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await loop.run_in_executor(executor, connections.close_all)
+        executor.shutdown()
+
+
+def markdown(title, text):
+    return f'# {title}\n\n{text}\n'
+
+
+class JsonlWriter:
+    """Строка JSON на заметку."""
+
+    def write(self, chunk):
+        return ''.join(
+            json.dumps(
+                dict(zip(FIELDS, row)), ensure_ascii=False, default=str
+            ) + '\n'
+            for row in chunk
+        ).encode()
+
+    def close(self):
+        return b''
+
+
+class ZipWriter:
+    """ZIP с файлом <slug>.md на каждую заметку."""
+
+    def __init__(self):
+        self.sink = _Sink()
+        self.archive = zipfile.ZipFile(self.sink, 'w', zipfile.ZIP_DEFLATED)
+
+    def write(self, chunk):
+        for slug, title, text, updated_at in chunk:
+            info = zipfile.ZipInfo(f'{slug}.md', updated_at.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            self.archive.writestr(info, markdown(title, text))
+        return self.sink.pop()
+
+    def close(self):
+        self.archive.close()
+        return self.sink.pop()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'zip': ZipWriter}
+
+
+def stream(queryset, chunk_size, file_format):
+    writer = WRITERS[file_format]()
+    for chunk in chunks(queryset, chunk_size):
+        yield writer.write(chunk)
+    yield writer.close()
+
+
+async def astream(queryset, chunk_size, file_format):
+    writer = WRITERS[file_format]()
+    async for chunk in achunks(queryset, chunk_size):
+        yield writer.write(chunk)
+    yield writer.close()
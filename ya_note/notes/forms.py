@@ -1,9 +1,7 @@
-from pytils.translit import slugify
-
 from django import forms
-from django.core.exceptions import ValidationError
 
 from .models import Note
+from .slugs import slugify_title
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -16,14 +14,26 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+        """
+        Формирует slug из заголовка, если он не указан.
+
+        Уникальность здесь не проверяем: это делает ограничение базы
+        при сохранении, см. NoteBase.form_valid. Так нет лишнего запроса
+        и гонки между проверкой и вставкой.
+        """
         cleaned_data = super().clean()
         slug = cleaned_data.get('slug')
+        self.slug_generated = not slug
         if not slug:
             title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
+            slug = slugify_title(
+                title, Note._meta.get_field('slug').max_length
+            )
         return slug
+
+    def validate_unique(self):
+        """
+        Не проверяем уникальность запросом перед сохранением.
+
+        Единственное уникальное поле — slug, его проверяет база.
+        """
@@ -0,0 +1,171 @@
+"""
+Замеры стоимости запросов по маршрутам.
+
+Число и время SQL, время шаблона и вью; включаются настройкой
+REQUEST_METRICS, см. middleware.RequestMetricsMiddleware.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('notes.metrics')
+
+PERCENTILES = (50, 95, 99)
+FIELDS = ('total_ms', 'view_ms', 'template_ms', 'sql_ms', 'queries')
+UNRESOLVED = '<unresolved>'
+
+# Счётчики текущего запроса; None — запрос не замеряется.
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса."""
+
+    __slots__ = ('started', 'queries', 'sql_seconds', 'template_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = self.template_seconds = 0.0
+
+    def sample(self):
+        """Замер в миллисекундах; view — всё, кроме отрисовки шаблона."""
+        total = time.perf_counter() - self.started
+        return {
+            'total_ms': _ms(total),
+            'view_ms': _ms(total - self.template_seconds),
+            'template_ms': _ms(self.template_seconds),
+            'sql_ms': _ms(self.sql_seconds),
+            'queries': self.queries,
+        }
+
+
+def count_queries(execute, sql, params, many, context):
+    """execute_wrapper: считает запросы и их время в current_metrics."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_seconds += time.perf_counter() - started
+
+
+def install_query_counter(sender=None, connection=None, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def enable():
+    """
+    Ставит count_queries на соединения: уже открытые в этом потоке
+    и все новые, в том числе из пула потоков асинхронных страниц.
+    """
+    connection_created.connect(
+        install_query_counter, dispatch_uid='notes.instrumentation'
+    )
+    for connection in connections.all():
+        install_query_counter(connection=connection)
+
+
+def disable():
+    """Обратное enable(): для тестов, где включают REQUEST_METRICS."""
+    connection_created.disconnect(dispatch_uid='notes.instrumentation')
+    for connection in connections.all():
+        if count_queries in connection.execute_wrappers:
+            connection.execute_wrappers.remove(count_queries)
+
+
+def route_name(request):
+    """Имя маршрута вида notes:detail — по нему группируются замеры."""
+    match = request.resolver_match
+    return match.view_name if match else UNRESOLVED
+
+
+def server_timing(sample):
+    """Значение заголовка Server-Timing для инструментов браузера."""
+    return ', '.join((
+        f'sql;dur={sample["sql_ms"]};desc="{sample["queries"]} queries"',
+        f'template;dur={sample["template_ms"]}',
+        f'view;dur={sample["view_ms"]}',
+        f'total;dur={sample["total_ms"]}',
+    ))
+
+
+def log_request(request, response, route, sample):
+    """Одна строка JSON на запрос в логгер notes.metrics."""
+    record = {
+        'route': route,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        **sample,
+    }
+    logger.info(json.dumps(record), extra={'metrics': record})
+
+
+def _percentiles(values):
+    ordered = sorted(values)
+    return {
+        f'p{percent}': ordered[
+            max(math.ceil(len(ordered) * percent / 100) - 1, 0)
+        ]
+        for percent in PERCENTILES
+    }
+
+
+class RouteStats:
+    """
+    Последние REQUEST_METRICS_WINDOW замеров каждого маршрута в пределах
+    процесса; info() считает по ним перцентили.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(self._window)
+
+    @staticmethod
+    def _window():
+        return deque(maxlen=settings.REQUEST_METRICS_WINDOW)
+
+    def record(self, route, sample):
+        with self.lock:
+            self.samples[route].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def info(self):
+        """{маршрут: {count, total_ms: {p50, p95, p99}, …}}."""
+        with self.lock:
+            samples = {
+                route: list(window) for route, window in self.samples.items()
+            }
+        return {
+            route: {
+                'count': len(window),
+                **{
+                    field: _percentiles(sample[field] for sample in window)
+                    for field in FIELDS
+                },
+            }
+            for route, window in sorted(samples.items())
+        }
+
+
+route_stats = RouteStats()
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.services import FORMATS, bulk_import_notes, read_records
+
+
+class Command(BaseCommand):
+    help = 'Загружает заметки пользователя из файла JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу с заметками.')
+        parser.add_argument(
+            '--author',
+            required=True,
+            help='Имя пользователя, которому достанутся заметки.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько строк вставлять одной транзакцией.',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Не удалось определить формат файла {path}, '
+                f'укажите --format.'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        try:
+            author = get_user_model().objects.get_by_natural_key(
+                options['author']
+            )
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["author"]}.')
+        with path.open(encoding='utf-8', newline='') as stream:
+            report = bulk_import_notes(
+                read_records(stream, file_format), author,
+                options['batch_size'],
+            )
+        for number, batch in enumerate(report.batches, 1):
+            self.stdout.write(
+                f'Пачка {number}: загружено {batch.imported}, '
+                f'пропущено {batch.skipped}, {batch.seconds:.3f} с'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено: {report.imported}, пропущено: {report.skipped}, '
+            f'{report.seconds:.2f} с, {report.rows_per_second} строк/с'
+        ))
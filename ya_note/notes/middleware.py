@@ -0,0 +1,91 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import instrumentation
+from .db import replica_reads
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class PrimaryPinningMiddleware:
+    """
+    Решает, можно ли запросу читать из реплики.
+
+    После любого небезопасного запроса пользователь на
+    REPLICA_PIN_SECONDS получает cookie и все это время читает из
+    primary: новый комментарий или заметка видны сразу после
+    перенаправления, даже если реплика ещё отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = replica_reads.set({'allowed': False})
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        replica_reads.get()['allowed'] = (
+            getattr(view, 'replica_reads', False)
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+        )
+
+
+class RequestMetricsMiddleware:
+    """
+    Замеряет каждый запрос: SQL, отрисовку шаблона и вью.
+
+    Отдаёт заголовок Server-Timing, пишет строку JSON в логгер
+    notes.metrics и копит замеры по маршрутам для страницы notes:metrics.
+    Без REQUEST_METRICS исключается из цепочки при загрузке
+    (MiddlewareNotUsed) и ничего не стоит. Время StreamingHttpResponse
+    учитывается до начала отдачи тела.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.enable()
+
+    def __call__(self, request):
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.current_metrics.reset(token)
+        route = instrumentation.route_name(request)
+        sample = metrics.sample()
+        instrumentation.route_stats.record(route, sample)
+        instrumentation.log_request(request, response, route, sample)
+        response['Server-Timing'] = instrumentation.server_timing(sample)
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        TemplateResponse рисуется сразу после этого вызова. Асинхронные
+        страницы рисуют шаблон сами, их время попадает во view.
+        """
+        metrics = instrumentation.current_metrics.get()
+        started = time.perf_counter()
+
+        def rendered(response):
+            metrics.template_seconds += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
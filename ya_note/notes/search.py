@@ -0,0 +1,173 @@
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Note
+
+# Модель -> (таблица FTS5 в SQLite, индексируемые поля).
+INDEXES = {
+    Note: ('notes_note_fts', ('title', 'text')),
+}
+TOKENIZER = 'unicode61 remove_diacritics 2'
+POSTGRES_CONFIG = 'russian'
+MIN_STEM_LENGTH = 3
+
+# Окончания русских слов от длинных к коротким. Запрос ищет слова
+# по основе как по префиксу, и «новости» находит «новость» и «новостей».
+ENDINGS = sorted((
+    'ейшими', 'ующими', 'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему',
+    'ыми', 'ими', 'ией', 'иям', 'ием', 'иях', 'ую', 'юю', 'ая', 'яя',
+    'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ом', 'ем', 'ам',
+    'ям', 'ах', 'ях', 'ов', 'ев', 'ия', 'ье', 'ья', 'а', 'я', 'о', 'е',
+    'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+WORD = re.compile(r'\w+')
+
+
+def stem(word):
+    """Грубая основа русского слова: отрезает самое длинное окончание."""
+    for ending in ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)]
+    return word
+
+
+def terms(query):
+    return [stem(word) for word in WORD.findall(query.lower())]
+
+
+def fts_enabled(connection):
+    """
+    Есть ли в базе таблицы FTS5, созданные миграцией.
+
+    Запоминается только найденная таблица: отсутствующую проверяем
+    заново, ведь её может создать migrate или rebuild позже.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    if not getattr(connection, '_notes_fts_enabled', False):
+        connection._notes_fts_enabled = (
+            INDEXES[Note][0] in connection.introspection.table_names()
+        )
+    return connection._notes_fts_enabled
+
+
+def postgres_vector(fields, table=None):
+    """
+    SQL-выражение to_tsvector по полям, склеенным через пробел.
+
+    Совпадает с выражением GIN-индекса из миграции search_index, так
+    что PostgreSQL ищет по индексу. table уточняет столбцы для
+    запросов с JOIN.
+    """
+    prefix = f'"{table}".' if table else ''
+    vector = " || ' ' || ".join(
+        f'COALESCE({prefix}"{field}", \'\')' for field in fields
+    )
+    return f"to_tsvector('{POSTGRES_CONFIG}'::regconfig, {vector})"
+
+
+def search(queryset, query):
+    """
+    Фильтрует queryset по полнотекстовому запросу.
+
+    SQLite: таблица FTS5 и поиск по основам слов как по префиксам.
+    PostgreSQL: to_tsvector с русским стеммером по GIN-индексу,
+    выражение см. postgres_vector.
+    Иначе — icontains по основам, без индекса.
+    """
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    connection = connections[queryset.db]
+    table, fields = INDEXES[queryset.model]
+    if fts_enabled(connection):
+        match = ' AND '.join(f'"{word}"*' for word in words)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s', (match,)
+        ))
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchVectorField,
+        )
+
+        return queryset.alias(search_vector=RawSQL(
+            postgres_vector(fields, queryset.model._meta.db_table), [],
+            output_field=SearchVectorField(),
+        )).filter(search_vector=SearchQuery(
+            query, config=POSTGRES_CONFIG, search_type='plain'
+        ))
+    for word in words:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': word})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def index_object(obj, using):
+    """Добавляет или обновляет объект в индексе SQLite."""
+    connection = connections[using]
+    if not fts_enabled(connection):
+        return
+    table, fields = INDEXES[type(obj)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {table} (rowid, {", ".join(fields)}) '
+            f'VALUES (%s{", %s" * len(fields)})',
+            (obj.pk, *(getattr(obj, field) for field in fields)),
+        )
+
+
+def unindex_object(obj, using):
+    connection = connections[using]
+    if not fts_enabled(connection):
+        return
+    table, _ = INDEXES[type(obj)]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', (obj.pk,))
+
+
+def index_after(model, pk, using='default'):
+    """
+    Индексирует одним запросом все строки с pk больше заданного.
+
+    Нужен после bulk_create, который не отправляет сигналов.
+    """
+    connection = connections[using]
+    if not fts_enabled(connection):
+        return
+    table, fields = INDEXES[model]
+    columns = ', '.join(fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {table} (rowid, {columns}) '
+            f'SELECT id, {columns} FROM {model._meta.db_table} '
+            f'WHERE id > %s',
+            (pk,),
+        )
+
+
+def rebuild(using='default'):
+    """Пересоздаёт таблицы FTS5 по текущим данным."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        for model, (table, fields) in INDEXES.items():
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            try:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE {table} USING '
+                    f'fts5({", ".join(fields)}, tokenize="{TOKENIZER}")'
+                )
+            except OperationalError:
+                return False
+    if hasattr(connection, '_notes_fts_enabled'):
+        del connection._notes_fts_enabled
+    for model in INDEXES:
+        index_after(model, 0, using)
+    return True
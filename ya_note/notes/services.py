@@ -0,0 +1,182 @@
+import csv
+import json
+import time
+from collections import Counter, namedtuple
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import IntegrityError, transaction
+
+from . import search
+from .models import Note
+from .slugs import (
+    SUFFIX_WINDOW, free_variants, slugify_title, taken_variants,
+)
+
+FORMATS = ('jsonl', 'csv')
+ATTEMPTS = 3
+
+TITLE_LENGTH = Note._meta.get_field('title').max_length
+SLUG_LENGTH = Note._meta.get_field('slug').max_length
+
+BatchReport = namedtuple('BatchReport', 'imported skipped seconds')
+
+
+class ImportReport(namedtuple('ImportReport', 'batches')):
+    """Итог загрузки заметок: отчёт по каждой пачке."""
+
+    @property
+    def imported(self):
+        return sum(batch.imported for batch in self.batches)
+
+    @property
+    def skipped(self):
+        return sum(batch.skipped for batch in self.batches)
+
+    @property
+    def seconds(self):
+        return sum(batch.seconds for batch in self.batches)
+
+    @property
+    def rows_per_second(self):
+        rows = self.imported + self.skipped
+        return round(rows / self.seconds) if self.seconds else rows
+
+
+def read_records(stream, file_format):
+    """
+    Построчно читает записи из JSONL или CSV.
+
+    Ожидаются поля title, text и необязательное slug. Неразборчивая
+    строка JSONL отдаётся как None и считается пропущенной.
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _clean(record):
+    """(title, text, slug, slug_generated) или None, если запись плохая."""
+    try:
+        title, text = record['title'].strip(), record['text'].strip()
+        slug = (record.get('slug') or '').strip()
+    except (KeyError, TypeError, AttributeError):
+        return None
+    if not title or not text or len(title) > TITLE_LENGTH:
+        return None
+    if not slug:
+        slug = slugify_title(title, SLUG_LENGTH)
+        return (title, text, slug, True) if slug else None
+    try:
+        validate_slug(slug)
+    except ValidationError:
+        return None
+    return (title, text, slug, False) if len(slug) <= SLUG_LENGTH else None
+
+
+def _taken(occurrences):
+    """
+    Занятые slug и спорные основы пачки.
+
+    Основы проверяются одним запросом slug__in. Спорные — занятые в
+    базе или повторяющиеся в пачке — вторым запросом получают занятость
+    своих вариантов с суффиксами, как в free_slug: столько номеров,
+    сколько раз основа встречается в пачке, и ещё SUFFIX_WINDOW.
+    Возвращает (taken, {спорная основа: первый непроверенный номер}).
+    """
+    bases = set(occurrences)
+    taken = set(
+        Note.objects.filter(slug__in=bases).values_list('slug', flat=True)
+    )
+    checked = {
+        slug: occurrences[slug] + SUFFIX_WINDOW + 2
+        for slug in bases
+        if occurrences[slug] > 1 or slug in taken
+    }
+    taken |= taken_variants(
+        Note.objects,
+        {slug: (2, stop) for slug, stop in checked.items()},
+        SLUG_LENGTH,
+    )
+    return taken, checked
+
+
+def _build_notes(records, author):
+    """
+    Проверяет пачку записей и раздаёт slug по правилам формы.
+
+    Занятый slug, указанный в записи, — запись пропускается;
+    сформированный из заголовка получает свободный суффикс -2, -3…
+    """
+    rows = [row for row in map(_clean, records) if row]
+    occurrences = Counter(slug for _, _, slug, _ in rows)
+    taken, checked = _taken(occurrences)
+    # Бесспорные slug занимаем первыми, чтобы суффиксы их не задели.
+    used = {slug for slug in occurrences if slug not in checked}
+    free = {
+        slug: free_variants(
+            Note.objects, slug, SLUG_LENGTH, taken, stop, used
+        )
+        for slug, stop in checked.items()
+    }
+    notes = []
+    for title, text, slug, generated in rows:
+        if slug in free:
+            if not generated and (slug in taken or slug in used):
+                continue
+            slug = next(free[slug])
+            used.add(slug)
+        notes.append(Note(title=title, text=text, slug=slug, author=author))
+    return notes
+
+
+def _insert(batch, author):
+    """
+    Вставляет пачку одной транзакцией вместе с поисковым индексом.
+
+    Если slug успели занять между проверкой и вставкой, пачка
+    собирается заново; после ATTEMPTS неудач она пропускается целиком.
+    """
+    for _ in range(ATTEMPTS):
+        notes = _build_notes(batch, author)
+        try:
+            with transaction.atomic():
+                last_pk = Note.objects.order_by('-pk').values_list(
+                    'pk', flat=True
+                ).first() or 0
+                Note.objects.bulk_create(notes)
+                search.index_after(Note, last_pk)
+        except IntegrityError:
+            continue
+        return notes
+    return []
+
+
+def bulk_import_notes(records, author, batch_size=500):
+    """
+    Загружает заметки автора пачками через bulk_create.
+
+    slug для всей пачки формируются за один проход, а занятость
+    проверяется одним-двумя запросами на пачку вместо запроса на каждую
+    заметку. В памяти держится только текущая пачка.
+    """
+    batches = []
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        start = time.perf_counter()
+        notes = _insert(batch, author)
+        batches.append(BatchReport(
+            len(notes), len(batch) - len(notes), time.perf_counter() - start
+        ))
+    return ImportReport(batches)
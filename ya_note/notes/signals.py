@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import Note
+
+
+@receiver(post_save, sender=Note)
+def update_search_index(sender, instance, using, **kwargs):
+    search.index_object(instance, using)
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    search.unindex_object(instance, using)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Применяет settings.SQLITE_PRAGMAS к каждому новому соединению."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
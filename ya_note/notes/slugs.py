@@ -0,0 +1,90 @@
+from functools import lru_cache
+from itertools import count
+
+from django.conf import settings
+from pytils.translit import slugify
+
+# Сколько вариантов slug-N проверяется одним запросом.
+SUFFIX_WINDOW = 20
+# Не больше параметров в одном slug__in: у SQLite есть предел.
+IN_BATCH = 500
+
+
+@lru_cache(maxsize=settings.SLUG_CACHE_SIZE)
+def _slugify(title):
+    return slugify(title)
+
+
+def slugify_title(title, max_length):
+    """
+    slug из заголовка: транслитерация pytils, обрезанная до max_length.
+
+    Транслитерация запоминается в LRU-кэше на SLUG_CACHE_SIZE
+    заголовков: одинаковые заголовки при массовой загрузке заметок
+    не транслитерируются заново.
+    """
+    return _slugify(title)[:max_length]
+
+
+def slug_cache_info():
+    """Счётчики кэша для мониторинга: hits, misses, maxsize, currsize."""
+    return _slugify.cache_info()._asdict()
+
+
+def with_suffix(slug, number, max_length):
+    """slug-2, slug-3…; основа обрезается, чтобы влезть в max_length."""
+    suffix = f'-{number}'
+    return slug[:max_length - len(suffix)] + suffix
+
+
+def variant(slug, number, max_length):
+    """Вариант номер number: сам slug для 1, иначе with_suffix."""
+    return slug if number == 1 else with_suffix(slug, number, max_length)
+
+
+def taken_variants(queryset, ranges, max_length):
+    """
+    Занятые варианты slug: ranges — {slug: (start, stop)} номеров.
+
+    Варианты строятся так же, как их выдаёт with_suffix, с обрезанной
+    основой, и проверяются запросами slug__in по уникальному индексу
+    пачками по IN_BATCH: читаются только сами варианты, а не все slug
+    с тем же началом.
+    """
+    wanted = [
+        variant(slug, number, max_length)
+        for slug, (start, stop) in ranges.items()
+        for number in range(start, stop)
+    ]
+    taken = set()
+    for index in range(0, len(wanted), IN_BATCH):
+        taken.update(queryset.filter(
+            slug__in=wanted[index:index + IN_BATCH]
+        ).values_list('slug', flat=True))
+    return taken
+
+
+def free_variants(queryset, slug, max_length, taken, checked=1,
+                  reserved=frozenset()):
+    """
+    Свободные варианты slug по порядку: slug, slug-2, slug-3…
+
+    Номера меньше checked проверяются по taken, дальше варианты
+    читаются окнами по SUFFIX_WINDOW через taken_variants и
+    добавляются в taken. reserved — slug, уже занятые в памяти;
+    его можно пополнять между выдачами.
+    """
+    for number in count(1):
+        if number >= checked:
+            checked = number + SUFFIX_WINDOW
+            taken |= taken_variants(
+                queryset, {slug: (number, checked)}, max_length
+            )
+        candidate = variant(slug, number, max_length)
+        if candidate not in taken and candidate not in reserved:
+            yield candidate
+
+
+def free_slug(queryset, slug, max_length):
+    """Первый свободный вариант slug, slug-2, slug-3…; обычно один запрос."""
+    return next(free_variants(queryset, slug, max_length, set()))
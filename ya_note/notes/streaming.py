@@ -0,0 +1,57 @@
+"""
+Потоковые ответы с асинхронным итератором для ASGI.
+
+Django 3.2 перебирает StreamingHttpResponse обычным for прямо в цикле
+событий, и каждое чтение из базы останавливало бы цикл. ASGIHandler
+отсюда перебирает AsyncStreamingHttpResponse через async for; сам
+обработчик подключается в yanote/asgi.py.
+"""
+from django.core.handlers import asgi
+from django.http import StreamingHttpResponse
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+    """
+    Ответ, тело которого — асинхронный итератор байтов.
+
+    Отдавать его можно только запросу с request.async_streaming, его
+    выставляет ASGIHandler: для остальных обработчиков тело пустое.
+    """
+
+    def __init__(self, async_content, *args, **kwargs):
+        super().__init__((), *args, **kwargs)
+        self.async_content = async_content
+
+
+class ASGIHandler(asgi.ASGIHandler):
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.async_streaming = True
+        return request, error_response
+
+    async def send_response(self, response, send):
+        """
+        Тело AsyncStreamingHttpResponse отправляется перед последним
+        сообщением, заголовки собирает обработчик Django.
+        """
+        if not isinstance(response, AsyncStreamingHttpResponse):
+            return await super().send_response(response, send)
+
+        async def send_with_content(message):
+            if (message['type'] == 'http.response.body'
+                    and not message.get('more_body')):
+                async for part in response.async_content:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        })
+            await send(message)
+
+        try:
+            await super().send_response(response, send_with_content)
+        finally:
+            await response.async_content.aclose()
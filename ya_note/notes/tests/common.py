@@ -1,18 +1,78 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.test import Client
 from notes.models import Note
 
+from . import nplusone
+
 User = get_user_model()
 
 
-class CommonTestCases(TestCase):
+def allow_nplusone(*patterns):
+    """Декоратор теста: разрешить повторы запросов, подходящих под patterns."""
+    def decorate(test):
+        test.nplusone_allowlist = patterns
+        return test
+    return decorate
+
+
+class NPlusOneMixin:
+    """
+    Каждый запрос тестового клиента проверяется на N+1.
+
+    Повторы, которые нужны намеренно, — регулярные выражения в
+    nplusone_allowlist класса или в @allow_nplusone теста; None
+    отключает проверку для класса.
+    """
+    nplusone_allowlist = ()
+
+    def setUp(self):
+        super().setUp()
+        if self.nplusone_allowlist is None:
+            return
+        send = Client.request
+        allowlist = self.nplusone_allowlist + getattr(
+            getattr(self, self._testMethodName), 'nplusone_allowlist', ()
+        )
+
+        def checked_request(client, **environ):
+            with nplusone.detect(environ['PATH_INFO'], allowlist):
+                return send(client, **environ)
+
+        patcher = mock.patch.object(Client, 'request', checked_request)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+def make_users(*usernames):
+    """
+    Пользователи одним bulk_create; возвращаются в порядке usernames.
+
+    SQLite в Django 3.2 не возвращает pk из bulk_create, поэтому
+    созданные строки читаются обратно одним запросом.
+    """
+    User.objects.bulk_create(User(username=name) for name in usernames)
+    users = User.objects.in_bulk(usernames, field_name='username')
+    return [users[name] for name in usernames]
+
+
+def make_notes(author, count):
+    """count заметок автора одним bulk_create, slug — note-0, note-1…"""
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст', slug=f'note-{index}',
+             author=author)
+        for index in range(count)
+    )
+
+
+class CommonTestCases(NPlusOneMixin, TestCase):
     @classmethod
     def setup_common(cls):
-        cls.author = User.objects.create(username='author')
+        cls.author, cls.auth_user = make_users('author', 'auth_user')
         cls.author_client = Client()
         cls.author_client.force_login(cls.author)
-        cls.auth_user = User.objects.create(username='auth_user')
         cls.auth_user_client = Client()
         cls.auth_user_client.force_login(cls.auth_user)
 
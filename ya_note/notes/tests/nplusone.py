@@ -0,0 +1,142 @@
+"""
+Поиск N+1 в запросах одного обращения тестового клиента.
+
+Одинаковые по форме запросы (SQL без параметров, списки IN и строки
+bulk_create свёрнуты) за один запрос к странице — почти всегда N+1:
+обращение к связанному объекту в цикле шаблона или во вью. Для каждой
+формы запоминается, откуда пришёл первый запрос: строка шаблона,
+атрибут модели и ближайшая строка кода проекта.
+"""
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.db import connections
+from django.db.models.fields import related_descriptors
+
+# Форма, повторившаяся столько раз, считается N+1.
+THRESHOLD = 2
+TESTS_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = TESTS_DIR.parents[1]
+IN_LIST = re.compile(r'%s(?:, %s)+')
+# Строки bulk_create: VALUES (…), (…) или, в SQLite, SELECT … UNION ALL.
+VALUES_ROWS = re.compile(r'VALUES \(%s(?:, %s)*\)(?:, \(%s(?:, %s)*\))*')
+SELECT_ROWS = re.compile(
+    r'(?<=\) )SELECT %s(?:, %s)*(?: UNION ALL SELECT %s(?:, %s)*)*'
+)
+DESCRIPTORS = related_descriptors.__file__
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def shape(sql):
+    """
+    SQL без зависимости от длины списков IN (%s, %s, …) и от числа
+    строк, вставляемых одним bulk_create.
+    """
+    sql = VALUES_ROWS.sub('VALUES (…)', sql)
+    sql = SELECT_ROWS.sub('SELECT …', sql)
+    return IN_LIST.sub('%s, …', sql)
+
+
+def _template_line(frame):
+    """Строка шаблона, если кадр — Node.render_annotated."""
+    node = frame.f_locals.get('self')
+    if (frame.f_code.co_name != 'render_annotated'
+            or getattr(node, 'origin', None) is None):
+        return None
+    token = node.token
+    tag = '{{ %s }}' if token.token_type.name == 'VAR' else '{%% %s %%}'
+    return f'{node.origin.template_name}:{token.lineno} ' + tag % (
+        token.contents
+    )
+
+
+def _attribute(frame):
+    """Модель.поле, если кадр — дескриптор связанного объекта."""
+    descriptor = frame.f_locals.get('self')
+    instance = frame.f_locals.get('instance')
+    if (frame.f_code.co_filename != DESCRIPTORS
+            or instance is None or not hasattr(descriptor, 'field')):
+        return None
+    return f'{type(instance).__name__}.{descriptor.field.name}'
+
+
+def _code_line(frame):
+    """Строка кода проекта, кроме тестов и цепочки middleware."""
+    path = Path(frame.f_code.co_filename)
+    if (PROJECT_DIR not in path.parents or TESTS_DIR in path.parents
+            or path.name == 'middleware.py'):
+        return None
+    return (
+        f'{path.relative_to(PROJECT_DIR)}:{frame.f_lineno} '
+        f'in {frame.f_code.co_name}'
+    )
+
+
+def origin(frame):
+    """
+    Откуда выполняется запрос: ближайшие к нему строка шаблона, атрибут
+    модели и строка кода проекта; ненайденное — None.
+    """
+    found = [None, None, None]
+    while frame is not None and None in found:
+        for index, locate in enumerate(
+            (_template_line, _attribute, _code_line)
+        ):
+            if found[index] is None:
+                found[index] = locate(frame)
+        frame = frame.f_back
+    return tuple(found)
+
+
+class QueryLog:
+    """execute_wrapper: считает формы запросов и их первое происхождение."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        key = shape(sql)
+        self.counts[key] += 1
+        if key not in self.origins:
+            self.origins[key] = origin(sys._getframe(1))
+        return execute(sql, params, many, context)
+
+    def repeated(self, allowlist=(), threshold=THRESHOLD):
+        """Формы, повторившиеся threshold раз и не попавшие в allowlist."""
+        return {
+            sql: count for sql, count in self.counts.items()
+            if count >= threshold
+            and not any(re.search(pattern, sql) for pattern in allowlist)
+        }
+
+    def report(self, repeated, path):
+        lines = [f'N+1 при запросе {path}:']
+        for sql, count in repeated.items():
+            lines.append(f'  {count} × {sql}')
+            lines.extend(
+                f'      {place}' for place in self.origins[sql] if place
+            )
+        return '\n'.join(lines)
+
+
+@contextmanager
+def detect(path, allowlist=()):
+    """
+    Собирает запросы всех соединений внутри блока и падает с
+    NPlusOneError, если какая-то форма повторилась.
+    """
+    log = QueryLog()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
+    repeated = log.repeated(allowlist)
+    if repeated:
+        raise NPlusOneError(log.report(repeated, path))
@@ -1,6 +1,26 @@
+import asyncio
+import io
+import json
+import threading
+import zipfile
+from importlib import import_module
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.db import connection
+from django.test import (
+    Client, SimpleTestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from .common import CommonTestCases
+from notes import export, instrumentation, search
+from notes.instrumentation import route_stats
+from notes.models import Note
+from notes.streaming import ASGIHandler
+from .common import CommonTestCases, User, make_notes
 
 
 class TestRoutes(CommonTestCases):
@@ -30,3 +50,165 @@ class TestRoutes(CommonTestCases):
                 url = reverse(name, args=args)
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=1)
+    def test_notes_list_next_page(self):
+        """Следующая страница заметок открывается по ?after=."""
+        second_note = Note.objects.create(
+            title='Вторая', text='Текст', slug='second', author=self.author
+        )
+        url = reverse('notes:list')
+        response = self.author_client.get(url)
+        self.assertEqual(list(response.context['object_list']), [self.note])
+        response = self.author_client.get(
+            url, {'after': response.context['next_after']}
+        )
+        self.assertEqual(
+            list(response.context['object_list']), [second_note]
+        )
+        self.assertNotIn('next_after', response.context)
+
+    def test_notes_list_search(self):
+        """Поиск находит только свои заметки по форме слова."""
+        found = Note.objects.create(
+            title='Покупки на неделю', text='Молоко и хлеб', slug='shopping',
+            author=self.author,
+        )
+        Note.objects.create(
+            title='Покупки', text='Хлеб', slug='other-shopping',
+            author=self.auth_user,
+        )
+        response = self.author_client.get(
+            reverse('notes:list'), {'q': 'покупка хлеба'}
+        )
+        self.assertEqual(list(response.context['object_list']), [found])
+
+    @override_settings(NOTES_EXPORT_CHUNK_SIZE=2)
+    def test_export(self):
+        """Выгрузка содержит все свои заметки и только их."""
+        make_notes(self.author, 4)
+        slugs = {self.note.slug, *(f'note-{index}' for index in range(4))}
+        url = reverse('notes:export')
+        response = self.author_client.get(url)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual({json.loads(line)['slug'] for line in lines}, slugs)
+        response = self.author_client.get(url, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        self.assertEqual(
+            set(archive.namelist()), {f'{slug}.md' for slug in slugs}
+        )
+        self.assertEqual(
+            archive.read('note-0.md').decode(), '# Заметка 0\n\nТекст\n'
+        )
+        response = self.auth_user_client.get(url)
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    @override_settings(REQUEST_METRICS=True)
+    def test_request_metrics(self):
+        # Middleware ставит счётчик на соединения, общие с другими тестами.
+        self.addCleanup(instrumentation.disable)
+        route_stats.clear()
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('notes:detail', args=(self.note.slug,))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertIn(
+            f'desc="{len(queries)} queries"', response['Server-Timing']
+        )
+        metrics_url = reverse('notes:metrics')
+        self.assertEqual(client.get(metrics_url).status_code, 403)
+        client.force_login(
+            User.objects.create(username='staff', is_staff=True)
+        )
+        data = client.get(metrics_url).json()
+        self.assertEqual(data['routes']['notes:detail']['count'], 1)
+        self.assertIn('hits', data['slug_cache'])
+
+    def test_request_metrics_disabled(self):
+        response = self.author_client.get(reverse('notes:list'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class TestAsyncExport(TransactionTestCase):
+
+    async def get(self, path, session_key, loop_ran):
+        """
+        GET через ASGIHandler; пока идёт запрос, цикл событий каждые
+        10 мс выставляет loop_ran.
+        """
+        async def tick():
+            while True:
+                loop_ran.set()
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        communicator = ApplicationCommunicator(ASGIHandler(), {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', (
+                    f'{settings.SESSION_COOKIE_NAME}={session_key}'
+                ).encode()),
+            ],
+        })
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output()
+        body = b''
+        while True:
+            message = await communicator.receive_output()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        ticker.cancel()
+        return start['status'], body
+
+    @override_settings(NOTES_EXPORT_CHUNK_SIZE=2)
+    def test_export_does_not_block_event_loop(self):
+        """Под ASGI цикл событий работает, пока читается пачка заметок."""
+        author = User.objects.create(username='Автор')
+        make_notes(author, 3)
+        client = Client()
+        client.force_login(author)
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        loop_ran, ran_during_fetch = threading.Event(), []
+        islice = export.islice
+
+        def waiting_islice(*args):
+            loop_ran.clear()
+            ran_during_fetch.append(loop_ran.wait(timeout=1))
+            return islice(*args)
+
+        with mock.patch.object(export, 'islice', waiting_islice):
+            status, body = async_to_sync(self.get)(
+                reverse('notes:export'), session_key, loop_ran
+            )
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [json.loads(line)['slug'] for line in body.splitlines()],
+            [f'note-{index}' for index in range(3)],
+        )
+        self.assertEqual(ran_during_fetch, [True] * 3)
+
+
+class TestSearchIndex(SimpleTestCase):
+    def test_postgres_search_uses_index_expression(self):
+        """Запрос PostgreSQL повторяет выражение GIN-индекса из миграции."""
+        try:
+            import psycopg2  # noqa: F401
+        except ImportError:
+            self.skipTest('Нет psycopg2.')
+        migration = import_module('notes.migrations.0004_search_index')
+        fields = search.INDEXES[Note][1]
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            sql = str(search.search(Note.objects.all(), 'заметки').query)
+        self.assertIn(
+            migration.search_vector(fields),
+            sql.replace(f'"{Note._meta.db_table}".', ''),
+        )
@@ -1,15 +1,19 @@
 # Стандартная библиотека
+import json
 from http import HTTPStatus
+from unittest import mock
 
 # Сторонние библиотеки
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
 from django.urls import reverse
 from pytils.translit import slugify
 
 # Локальные модули
 from notes.models import Note
 from notes.forms import WARNING
-from .common import CommonTestCases
+from .common import CommonTestCases, allow_nplusone
 
 
 User = get_user_model()
@@ -73,6 +77,133 @@ class TestRoutes(CommonTestCases):
         expected_slug = slugify(self.data['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    # Первая вставка падает на занятом slug и повторяется с суффиксом.
+    @allow_nplusone(r'^INSERT INTO "notes_note"')
+    def test_generated_slug_gets_free_suffix(self):
+        """Совпавший slug из заголовка получает свободный суффикс."""
+        url = reverse(URL_NOTE_ADD)
+        self.data.pop('slug')
+        expected_slug = slugify(self.data['title'])
+        Note.objects.create(
+            title='Заголовок', text='Текст', slug=expected_slug,
+            author=self.auth_user,
+        )
+        response = self.author_client.post(url, self.data)
+        self.assertRedirects(response, reverse(URL_NOTE_SUCCESS))
+        new_note = Note.objects.get(author=self.author)
+        self.assertEqual(new_note.slug, f'{expected_slug}-2')
+
+    # Каждая следующая вставка сначала падает на занятом slug.
+    @allow_nplusone(r'^INSERT INTO "notes_note"')
+    def test_long_generated_slug_gets_free_suffix(self):
+        """Суффикс к slug длиной в поле укорачивает основу slug."""
+        url = reverse(URL_NOTE_ADD)
+        self.data.pop('slug')
+        self.data['title'] = 'Я' * 100
+        slug = slugify(self.data['title'])[:100]
+        for _ in range(3):
+            response = self.author_client.post(url, self.data)
+            self.assertRedirects(response, reverse(URL_NOTE_SUCCESS))
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {slug, f'{slug[:98]}-2', f'{slug[:98]}-3'},
+        )
+
+    def test_create_note_queries(self):
+        """Создание заметки не проверяет slug отдельным запросом."""
+        url = reverse(URL_NOTE_ADD)
+        # Сессия, пользователь, SAVEPOINT, INSERT, запись в поисковый
+        # индекс, RELEASE SAVEPOINT.
+        with self.assertNumQueries(6):
+            self.author_client.post(url, data=self.data)
+
+    # Основы пачки и варианты спорных основ — два запроса slug__in.
+    @allow_nplusone(r'WHERE "notes_note"."slug" IN')
+    def test_import_notes(self):
+        """Загрузка заметок по правилам формы: суффиксы и отказы."""
+        taken = slugify('Покупки')
+        Note.objects.create(
+            title='Покупки', text='Текст', slug=taken, author=self.auth_user,
+        )
+        records = (
+            {'title': 'Покупки', 'text': 'Хлеб'},
+            {'title': 'Покупки', 'text': 'Молоко'},
+            {'title': 'Дела', 'text': 'Позвонить', 'slug': 'todo'},
+            {'title': 'Дубль', 'text': 'Текст', 'slug': 'todo'},
+            {'title': 'Занято', 'text': 'Текст', 'slug': taken},
+            {'title': 'Без текста'},
+        )
+        upload = SimpleUploadedFile('notes.jsonl', '\n'.join(
+            json.dumps(record) for record in records
+        ).encode())
+        # Сессия, пользователь, два запроса занятых slug, последний id,
+        # SAVEPOINT, INSERT, запись в поисковый индекс, RELEASE SAVEPOINT.
+        with self.assertNumQueries(9):
+            response = self.author_client.post(
+                reverse('notes:import'), {'file': upload}
+            )
+        report = response.json()
+        self.assertEqual((report['imported'], report['skipped']), (3, 3))
+        self.assertEqual(len(report['batches']), 1)
+        self.assertEqual(
+            set(Note.objects.filter(
+                author=self.author
+            ).values_list('slug', flat=True)),
+            {f'{taken}-2', f'{taken}-3', 'todo'},
+        )
+        response = self.author_client.get(
+            reverse('notes:list'), {'q': 'молоко'}
+        )
+        self.assertEqual(len(response.context['object_list']), 1)
+
+    def test_import_long_titles_twice(self):
+        """Повторная загрузка длинных заголовков получает новые суффиксы."""
+        url = reverse('notes:import')
+        record = json.dumps({'title': 'Я' * 100, 'text': 'Текст'})
+        for _ in range(3):
+            upload = SimpleUploadedFile(
+                'notes.jsonl', f'{record}\n{record}\n'.encode()
+            )
+            response = self.author_client.post(url, {'file': upload})
+            self.assertEqual(response.json()['imported'], 2)
+        self.assertEqual(
+            Note.objects.filter(author=self.author).count(), 6
+        )
+
+    # Каждая из попыток заново проверяет slug пачки.
+    @allow_nplusone(r'FROM "notes_note"')
+    def test_import_skips_batch_after_conflicts(self):
+        """Пачка, раз за разом падающая на занятом slug, пропускается."""
+        upload = SimpleUploadedFile(
+            'notes.jsonl',
+            json.dumps({'title': 'Дела', 'text': 'Текст'}).encode(),
+        )
+        with mock.patch.object(
+            Note.objects, 'bulk_create', side_effect=IntegrityError
+        ):
+            response = self.author_client.post(
+                reverse('notes:import'), {'file': upload}
+            )
+        report = response.json()
+        self.assertEqual((report['imported'], report['skipped']), (0, 1))
+
+    def test_import_rejects_broken_file(self):
+        """Файл не в UTF-8 не роняет загрузку, а получает ответ 400."""
+        uploads = (
+            SimpleUploadedFile(
+                'notes.csv', 'title,text\nCafé,Crème\n'.encode('latin-1')
+            ),
+            SimpleUploadedFile('notes.jsonl', bytes(range(256))),
+        )
+        for upload in uploads:
+            with self.subTest(name=upload.name):
+                response = self.author_client.post(
+                    reverse('notes:import'), {'file': upload}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+                self.assertIn('error', response.json())
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+
     def test_author_can_delete_note(self):
         """Пользователь может удалять свои заметки."""
         self.note = Note.objects.create(
@@ -1,7 +1,12 @@
 from http import HTTPStatus
 
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TransactionTestCase
 from django.urls import reverse
+from notes import async_views
+from notes.models import Note
 
 from .common import CommonTestCases
 
@@ -72,6 +77,7 @@ class TestRoutes(CommonTestCases):
             ("notes:list", None),
             ("notes:success", None),
             ("notes:add", None),
+            ("notes:export", None),
             ("notes:detail", (self.note.slug,)),
             ("notes:edit", (self.note.slug,)),
             ("notes:delete", (self.note.slug,)),
@@ -82,3 +88,55 @@ class TestRoutes(CommonTestCases):
                 redirect_url = f"{login_url}?next={url}"
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+    def test_detail_page_not_modified(self):
+        """Неизменившаяся заметка отдаётся ответом 304."""
+        url = reverse('notes:detail', args=(self.note.slug,))
+        etag = self.author_client.get(url)['ETag']
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.auth_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TestAsyncViews(TransactionTestCase):
+    """
+    Асинхронные страницы чтения работают из пула потоков.
+
+    У потоков пула своё соединение с базой, поэтому данные теста
+    должны быть зафиксированы: TransactionTestCase.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note', author=self.author
+        )
+        self.pages = (
+            (async_views.notes_list, reverse('notes:list'), {}),
+            (async_views.note_detail,
+             reverse('notes:detail', args=(self.note.slug,)),
+             {'slug': self.note.slug}),
+        )
+
+    def get(self, view, url, user, kwargs):
+        request = RequestFactory().get(url)
+        request.user = user
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_author_sees_note(self):
+        """Автору страницы отдаются с его заметкой."""
+        for view, url, kwargs in self.pages:
+            with self.subTest(url=url):
+                response = self.get(view, url, self.author, kwargs)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn(self.note.title, response.content.decode())
+
+    def test_anonymous_redirected_to_login(self):
+        """Анонимный пользователь перенаправляется на страницу логина."""
+        login_url = reverse('users:login')
+        for view, url, kwargs in self.pages:
+            with self.subTest(url=url):
+                response = self.get(view, url, AnonymousUser(), kwargs)
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+                self.assertEqual(response.url, f'{login_url}?next={url}')
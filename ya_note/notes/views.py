@@ -1,9 +1,26 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+import csv
+import io
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db import IntegrityError, transaction
+from django.http import (
+    Http404, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse,
+    StreamingHttpResponse,
+)
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
+from . import export, search, services
+from .forms import WARNING, NoteForm
+from .instrumentation import route_stats
 from .models import Note
+from .slugs import free_slug, slug_cache_info
+from .streaming import AsyncStreamingHttpResponse
+
+SLUG_ATTEMPTS = 3
 
 
 class Home(generic.TemplateView):
@@ -25,6 +42,32 @@ class NoteBase(LoginRequiredMixin):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
+    def form_valid(self, form):
+        """
+        Сохраняет заметку, полагаясь на уникальный индекс slug.
+
+        Занятый slug, введённый вручную, — ошибка формы. Сформированный
+        из заголовка получает свободный суффикс -2, -3…
+        """
+        note = form.instance
+        slug = note.slug
+        for _ in range(SLUG_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    self.object = form.save()
+            except IntegrityError:
+                if not form.slug_generated:
+                    break
+                note.slug = free_slug(
+                    self.model.objects.exclude(pk=note.pk),
+                    slug,
+                    note._meta.get_field('slug').max_length,
+                )
+            else:
+                return HttpResponseRedirect(self.get_success_url())
+        form.add_error('slug', slug + WARNING)
+        return self.form_invalid(form)
+
 
 class NoteCreate(NoteBase, generic.CreateView):
     """Добавление заметки."""
@@ -32,9 +75,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -52,8 +93,157 @@ class NoteDelete(NoteBase, generic.DeleteView):
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    replica_reads = True
 
-
+    def get_queryset(self):
+        """
+        Страница заметок по ключу id: ?after=<id последней заметки>.
+
+        Запрос идёт по индексу (author, id), а текст заметок не
+        загружается: шаблону нужны только id, slug и title.
+        С ?q= выводятся только заметки, найденные полнотекстовым поиском.
+        """
+        try:
+            after = int(self.request.GET.get('after', 0))
+        except ValueError:
+            raise Http404('Некорректный курсор.')
+        self.notes = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        if self.request.GET.get('q', '').strip():
+            self.notes = search.search(self.notes, self.request.GET['q'])
+        return self.notes.filter(
+            id__gt=after
+        )[:settings.NOTES_COUNT_ON_LIST_PAGE]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = list(self.object_list)
+        if (len(page) == settings.NOTES_COUNT_ON_LIST_PAGE
+                and self.notes.filter(id__gt=page[-1].id).exists()):
+            context['next_after'] = page[-1].id
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """
+    Выгрузка всех заметок пользователя: ?format=jsonl (по умолчанию)
+    или ?format=zip — архив Markdown-файлов <slug>.md.
+
+    Заметки читаются пачками по NOTES_EXPORT_CHUNK_SIZE и сразу
+    отдаются клиенту, так что память не зависит от их числа. Под
+    ASGI пачки читаются, не останавливая цикл событий.
+    """
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get('format', 'jsonl')
+        if file_format not in export.FORMATS:
+            return HttpResponseBadRequest('Неизвестный формат выгрузки.')
+        content_type, filename = export.FORMATS[file_format]
+        queryset = self.get_queryset().order_by('id')
+        if getattr(request, 'async_streaming', False):
+            response = AsyncStreamingHttpResponse(
+                export.astream(
+                    queryset, settings.NOTES_EXPORT_CHUNK_SIZE, file_format
+                ),
+                content_type=content_type,
+            )
+        else:
+            response = StreamingHttpResponse(
+                export.stream(
+                    queryset, settings.NOTES_EXPORT_CHUNK_SIZE, file_format
+                ),
+                content_type=content_type,
+            )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class NoteImport(NoteBase, generic.View):
+    """
+    Загрузка заметок файлом: POST с полем file в формате JSONL или CSV.
+
+    Формат берётся из ?format= или из расширения файла. В ответе —
+    число загруженных и пропущенных записей и время каждой пачки.
+    Файл не в UTF-8 или битый CSV — ответ 400; пачки, загруженные
+    до ошибки, остаются.
+    """
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({'error': 'Нет файла.'}, status=400)
+        file_format = request.GET.get(
+            'format', upload.name.rpartition('.')[2].lower()
+        )
+        if file_format not in services.FORMATS:
+            return JsonResponse(
+                {'error': 'Неизвестный формат файла.'}, status=400
+            )
+        try:
+            report = services.bulk_import_notes(
+                services.read_records(
+                    io.TextIOWrapper(
+                        upload.file, encoding='utf-8', newline=''
+                    ),
+                    file_format,
+                ),
+                request.user,
+            )
+        except (UnicodeDecodeError, csv.Error):
+            return JsonResponse(
+                {'error': 'Файл не в UTF-8 или повреждён.'}, status=400
+            )
+        return JsonResponse({
+            'imported': report.imported,
+            'skipped': report.skipped,
+            'seconds': report.seconds,
+            'batches': [batch._asdict() for batch in report.batches],
+        })
+
+
+def note_last_modified(request, slug):
+    """
+    Время изменения заметки без загрузки самой заметки.
+
+    Один запрос по уникальному индексу slug; результат запоминается
+    в request, так как condition() спрашивает его и для ETag.
+    """
+    if not hasattr(request, '_note_last_modified'):
+        request._note_last_modified = Note.objects.filter(
+            author=request.user, slug=slug
+        ).values_list('updated_at', flat=True).first()
+    return request._note_last_modified
+
+
+def note_etag(request, slug):
+    last_modified = note_last_modified(request, slug)
+    if last_modified is None:
+        return None
+    return f'{slug}-{last_modified.timestamp()}'
+
+
+@method_decorator(
+    condition(etag_func=note_etag, last_modified_func=note_last_modified),
+    name='get',
+)
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    replica_reads = True
+
+
+class RequestMetrics(UserPassesTestMixin, generic.View):
+    """Перцентили замеров по маршрутам и счётчики кэша, только персоналу."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'enabled': settings.REQUEST_METRICS,
+            'routes': route_stats.info(),
+            'slug_cache': slug_cache_info(),
+        })
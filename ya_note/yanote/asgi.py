@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
-application = get_asgi_application()
+# Как get_asgi_application, но с обработчиком, который отдаёт потоковые
+# ответы, не останавливая цикл событий, см. notes/streaming.py.
+django.setup(set_prefix=False)
+
+from notes.streaming import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
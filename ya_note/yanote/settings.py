@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.middleware.RequestMetricsMiddleware',
+    'notes.middleware.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +52,9 @@ TEMPLATES = [
     },
 ]
 
+# Компилировать шаблоны при запуске, см. settings_production.py.
+TEMPLATE_WARMUP = False
+
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
@@ -56,9 +62,45 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле: с pytest --reuse-db (см. pytest.ini)
+        # она мигрируется один раз и дальше берётся готовой, под xdist
+        # у каждого процесса своя копия с суффиксом _gw0, _gw1…
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Реплика для чтения: DJANGO_REPLICA_DB=<путь к SQLite-файлу>. Локально
+# годится копия db.sqlite3; в тестах реплика — зеркало default.
+DATABASE_REPLICAS = []
+if os.getenv('DJANGO_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DJANGO_REPLICA_DB'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+
+# Профиль SQLite для продакшена: DJANGO_DB_PROFILE=production.
+# WAL позволяет читать во время записи, busy_timeout ждёт блокировку
+# вместо ошибки «database is locked», соединения живут между запросами.
+SQLITE_PRAGMAS = {}
+if os.getenv('DJANGO_DB_PROFILE') == 'production':
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 2 ** 20,
+        # Отрицательное значение — размер в КиБ, а не в страницах.
+        'cache_size': -64 * 2 ** 10,
+    }
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+
+DATABASE_ROUTERS = ['notes.db.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает только из primary.
+REPLICA_PIN_SECONDS = 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +129,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+
+SLUG_CACHE_SIZE = 10000
+
+NOTES_EXPORT_CHUNK_SIZE = 500
+
+# Замеры запросов, см. notes/instrumentation.py: заголовок Server-Timing,
+# лог notes.metrics и перцентили по маршрутам на странице notes:metrics.
+REQUEST_METRICS = os.getenv('DJANGO_REQUEST_METRICS') == '1'
+# Сколько последних запросов каждого маршрута хранится для перцентилей.
+REQUEST_METRICS_WINDOW = 1000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'notes.metrics': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Асинхронные страницы чтения для ASGI, см. async_views.py.
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS') == '1'
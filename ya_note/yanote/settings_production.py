@@ -0,0 +1,46 @@
+"""
+Настройки для продакшена: DJANGO_SETTINGS_MODULE=yanote.settings_production.
+
+Отключают отладку и включают кэширующий загрузчик шаблонов. Шаблоны
+из templates/ компилируются при запуске, см. notes/warmup.py. Профиль
+SQLite включается отдельно: DJANGO_DB_PROFILE=production.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import ALLOWED_HOSTS, TEMPLATES
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured(
+        'Для продакшена задайте переменную окружения DJANGO_SECRET_KEY.'
+    )
+
+if os.getenv('DJANGO_ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS').split(',')
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'context_processors': [
+            processor
+            for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+            if processor != 'django.template.context_processors.debug'
+        ],
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+    },
+}]
+
+TEMPLATE_WARMUP = True